@@ -73,8 +73,14 @@ async def run_ingestion(config: dict[str, Any]) -> dict[str, Any]:
     raw_data_dir = global_config.get('raw_data_dir', '/data/raw')
     
     # Initialize managers
-    checkpoint_mgr = CheckpointManager(checkpoint_dir)
-    storage_mgr = StorageManager(raw_data_dir)
+    checkpoint_mgr = CheckpointManager(
+        checkpoint_dir,
+        flush_interval=global_config.get('checkpoint_flush_interval', 5.0)
+    )
+    storage_mgr = StorageManager(
+        raw_data_dir,
+        concurrency=global_config.get('storage_concurrency', 1)
+    )
     
     # Ingest from each source
     sources = [
@@ -112,6 +118,8 @@ async def run_ingestion(config: dict[str, Any]) -> dict[str, Any]:
             results['sources'][source_name] = {'error': str(e)}
             console.print(f"[red]✗ {source_name}: {str(e)}[/red]")
     
+    storage_mgr.close()
+    
     results['end_time'] = datetime.utcnow().isoformat()
     return results
 
@@ -9,14 +9,15 @@ Fetches metadata from arXiv's public API with:
 """
 
 import asyncio
+import functools
 import logging
-import re
 from datetime import datetime
-from typing import Any, Optional
-from xml.etree import ElementTree as ET
+from typing import Any, Iterable, Optional
+
+from lxml import etree as LET
 
 from ingest.utils.checkpoint import CheckpointManager
-from ingest.utils.storage import StorageManager
+from ingest.utils.storage import BackgroundWriter, StorageManager
 from ingest.utils.rate_limiter import RateLimiter, RetryableHTTPClient
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,53 @@ NAMESPACES = {
     'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'
 }
 
+# Fully-qualified tag names, precomputed so lookups skip prefix expansion
+ATOM = NAMESPACES['atom']
+ARXIV = NAMESPACES['arxiv']
+OPENSEARCH = NAMESPACES['opensearch']
+
+_T_ENTRY = f'{{{ATOM}}}entry'
+_T_TOTAL_RESULTS = f'{{{OPENSEARCH}}}totalResults'
+_T_ID = f'{{{ATOM}}}id'
+_T_TITLE = f'{{{ATOM}}}title'
+_T_SUMMARY = f'{{{ATOM}}}summary'
+_T_AUTHOR = f'{{{ATOM}}}author'
+_T_NAME = f'{{{ATOM}}}name'
+_T_CATEGORY = f'{{{ATOM}}}category'
+_T_LINK = f'{{{ATOM}}}link'
+_T_PUBLISHED = f'{{{ATOM}}}published'
+_T_UPDATED = f'{{{ATOM}}}updated'
+_T_AFFIL = f'{{{ARXIV}}}affiliation'
+_T_PRIMARY_CAT = f'{{{ARXIV}}}primary_category'
+_T_DOI = f'{{{ARXIV}}}doi'
+_T_JOURNAL_REF = f'{{{ARXIV}}}journal_ref'
+_T_COMMENT = f'{{{ARXIV}}}comment'
+
+# Entry children copied verbatim (stripped) into the record field of this name
+_TEXT_FIELDS = {
+    _T_TITLE: 'title',
+    _T_SUMMARY: 'abstract',
+    _T_PUBLISHED: 'published',
+    _T_UPDATED: 'updated',
+    _T_DOI: 'doi',
+    _T_JOURNAL_REF: 'journal_ref',
+    _T_COMMENT: 'comment',
+}
+
+# Bytes handed to the pull parser per read from the response stream
+STREAM_CHUNK_SIZE = 65536
+
+# Only entries and the result count are needed from each feed
+_EVENT_TAGS = (_T_ENTRY, _T_TOTAL_RESULTS)
+
+# arXiv feeds carry no xml:id attributes and only indentation between
+# elements, so skip the id index and drop whitespace-only text nodes
+_PARSER_OPTIONS = {
+    'collect_ids': False,
+    'remove_blank_text': True,
+    'huge_tree': False,
+}
+
 
 class ArxivIngester:
     """Ingester for arXiv API."""
@@ -60,7 +108,13 @@ class ArxivIngester:
         
         self.max_records = config.get('max_records', 1000)
         self.batch_size = config.get('batch_size', 100)
+        # Checkpoint every N batches; bin boundaries are always checkpointed
+        self.checkpoint_interval = max(1, config.get('checkpoint_interval', 5))
         self.categories = config.get('categories', ['cs.AI'])
+        
+        # Queries depend only on config, so build them once
+        self._base_query = self._build_query(self.categories)
+        self._bin_queries = self._build_bin_queries()
     
     def _build_query(self, categories: list[str]) -> str:
         """Build arXiv search query from categories."""
@@ -68,95 +122,137 @@ class ArxivIngester:
             return f"cat:{categories[0]}"
         return " OR ".join(f"cat:{cat}" for cat in categories)
     
-    def _parse_entry(self, entry: ET.Element) -> dict[str, Any]:
-        """Parse an arXiv entry into a record."""
-        
-        def get_text(elem: Optional[ET.Element]) -> Optional[str]:
-            return elem.text.strip() if elem is not None and elem.text else None
-        
-        def get_all_text(elems: list[ET.Element]) -> list[str]:
-            return [e.text.strip() for e in elems if e.text]
+    def _parse_entry(self, entry: LET._Element) -> Optional[dict[str, Any]]:
+        """
+        Parse an arXiv entry into a record.
         
-        # Extract arXiv ID from the id URL
-        id_elem = entry.find('atom:id', NAMESPACES)
-        arxiv_id = None
-        if id_elem is not None and id_elem.text:
-            # ID format: http://arxiv.org/abs/2301.00001v1
-            match = re.search(r'abs/(.+)$', id_elem.text)
-            if match:
-                arxiv_id = match.group(1)
+        Walks the entry's children once and dispatches on the tag, rather
+        than running a separate find/findall traversal per field.
         
-        # Parse authors
+        Returns:
+            Parsed record, or None if the entry has no usable arXiv ID
+        """
         authors = []
-        for author_elem in entry.findall('atom:author', NAMESPACES):
-            name_elem = author_elem.find('atom:name', NAMESPACES)
-            affil_elem = author_elem.find('arxiv:affiliation', NAMESPACES)
-            if name_elem is not None and name_elem.text:
-                authors.append({
-                    'name': name_elem.text.strip(),
-                    'affiliation': get_text(affil_elem)
-                })
-        
-        # Parse categories
         categories = []
-        for cat_elem in entry.findall('atom:category', NAMESPACES):
-            term = cat_elem.get('term')
-            if term:
-                categories.append(term)
-        
-        # Parse links
         links = []
-        for link_elem in entry.findall('atom:link', NAMESPACES):
-            links.append({
-                'href': link_elem.get('href'),
-                'type': link_elem.get('type'),
-                'rel': link_elem.get('rel', 'alternate')
-            })
-        
-        # Parse dates
-        published = get_text(entry.find('atom:published', NAMESPACES))
-        updated = get_text(entry.find('atom:updated', NAMESPACES))
-        
-        return {
-            'arxiv_id': arxiv_id,
-            'title': get_text(entry.find('atom:title', NAMESPACES)),
-            'abstract': get_text(entry.find('atom:summary', NAMESPACES)),
+        record = {
+            'arxiv_id': None,
+            'title': None,
+            'abstract': None,
             'authors': authors,
             'categories': categories,
-            'primary_category': entry.find('arxiv:primary_category', NAMESPACES).get('term') if entry.find('arxiv:primary_category', NAMESPACES) is not None else None,
-            'published': published,
-            'updated': updated,
-            'doi': get_text(entry.find('arxiv:doi', NAMESPACES)),
-            'journal_ref': get_text(entry.find('arxiv:journal_ref', NAMESPACES)),
-            'comment': get_text(entry.find('arxiv:comment', NAMESPACES)),
+            'primary_category': None,
+            'published': None,
+            'updated': None,
+            'doi': None,
+            'journal_ref': None,
+            'comment': None,
             'links': links
         }
+        
+        for child in entry:
+            tag = child.tag
+            
+            field = _TEXT_FIELDS.get(tag)
+            if field is not None:
+                text = child.text
+                record[field] = text.strip() if text else None
+            
+            elif tag == _T_AUTHOR:
+                name = affiliation = None
+                for sub in child:
+                    if sub.tag == _T_NAME:
+                        name = sub.text
+                    elif sub.tag == _T_AFFIL:
+                        affiliation = sub.text.strip() if sub.text else None
+                if name:
+                    authors.append({
+                        'name': name.strip(),
+                        'affiliation': affiliation
+                    })
+            
+            elif tag == _T_CATEGORY:
+                term = child.get('term')
+                if term:
+                    categories.append(term)
+            
+            elif tag == _T_LINK:
+                links.append({
+                    'href': child.get('href'),
+                    'type': child.get('type'),
+                    'rel': child.get('rel', 'alternate')
+                })
+            
+            elif tag == _T_PRIMARY_CAT:
+                record['primary_category'] = child.get('term')
+            
+            elif tag == _T_ID and child.text:
+                # ID format: http://arxiv.org/abs/2301.00001v1
+                id_text = child.text.strip()
+                if '/abs/' in id_text:
+                    record['arxiv_id'] = id_text.rsplit('/abs/', 1)[-1] or None
+        
+        return record if record['arxiv_id'] else None
     
-    def _parse_response(self, xml_content: str) -> tuple[list[dict], int]:
+    def _consume_events(
+        self,
+        events: Iterable[tuple[str, LET._Element]],
+        records: list[dict]
+    ) -> Optional[int]:
         """
-        Parse arXiv API response.
+        Parse streamed feed elements into records.
+        
+        Each entry is cleared (along with already-processed siblings) once
+        parsed, so memory stays flat regardless of feed size.
+        
+        Returns:
+            totalResults if it was among the events, else None
+        """
+        total_results = None
+        
+        for _, elem in events:
+            if elem.tag == _T_TOTAL_RESULTS:
+                total_results = int(elem.text) if elem.text else 0
+                continue
+            
+            record = self._parse_entry(elem)
+            if record is not None:  # Only include valid entries
+                records.append(record)
+            
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        
+        return total_results
+    
+    async def _fetch_and_parse(
+        self,
+        client: RetryableHTTPClient,
+        params: dict[str, Any]
+    ) -> tuple[list[dict], int]:
+        """
+        Fetch an arXiv page and parse it while the body is still arriving.
         
         Returns:
             Tuple of (records, total_results)
         """
-        root = ET.fromstring(xml_content)
+        parser = LET.XMLPullParser(events=('end',), tag=_EVENT_TAGS, **_PARSER_OPTIONS)
+        records: list[dict] = []
+        total_results = None
         
-        # Get total results
-        total_elem = root.find('opensearch:totalResults', NAMESPACES)
-        total_results = int(total_elem.text) if total_elem is not None else 0
+        async with client.stream('GET', self.BASE_URL, params=params) as response:
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                parser.feed(chunk)
+                total = self._consume_events(parser.read_events(), records)
+                if total is not None:
+                    total_results = total
         
-        # Parse entries
-        records = []
-        for entry in root.findall('atom:entry', NAMESPACES):
-            try:
-                record = self._parse_entry(entry)
-                if record.get('arxiv_id'):  # Only include valid entries
-                    records.append(record)
-            except Exception as e:
-                logger.warning(f"Failed to parse arXiv entry: {e}")
-                continue
+        parser.close()
+        total = self._consume_events(parser.read_events(), records)
+        if total is not None:
+            total_results = total
         
-        return records, total_results
+        return records, total_results or 0
     
     def _get_year_ranges(self) -> list[tuple[int, int, int]]:
         """
@@ -200,10 +296,37 @@ class ArxivIngester:
         
         return result
 
+    def _build_bin_queries(self) -> list[tuple[str, int, str]]:
+        """
+        Build the query for each year bin.
+        
+        Returns:
+            List of (query, target_records, description) tuples
+        """
+        year_ranges = self._get_year_ranges()
+        if not year_ranges:
+            # Original behavior - fetch most recent
+            return [(self._base_query, self.max_records, "most recent")]
+        
+        # arXiv API uses submittedDate for filtering
+        # Format: YYYYMMDDHHMM
+        return [
+            (
+                f"({self._base_query}) AND submittedDate:[{start_year}01010000 TO {end_year}12312359]",
+                target_records,
+                f"years {start_year}-{end_year}"
+            )
+            for start_year, end_year, target_records in year_ranges
+        ]
+    
     async def ingest(self) -> dict[str, Any]:
         """
         Run the arXiv ingestion with year-balanced sampling.
         
+        Each year bin is checkpointed as its own phase: the checkpoint records
+        which bin is in progress and the offset reached within it, so a resume
+        skips completed bins and continues the current one where it stopped.
+        
         Returns:
             Ingestion result summary
         """
@@ -215,53 +338,69 @@ class ArxivIngester:
             'rate_limit_stats': {}
         }
         
-        # Check for checkpoint
-        records_processed, cursor = self.checkpoint_mgr.get_progress('arxiv')
-        start_offset = int(cursor) if cursor else 0
-        
-        if start_offset > 0:
-            logger.info(f"Resuming from offset {start_offset}")
-        
-        base_query = self._build_query(self.categories)
-        
-        # Get year ranges for balanced fetching
-        year_ranges = self._get_year_ranges()
+        bins = self._bin_queries
         
-        async with RetryableHTTPClient(
-            self.rate_limiter,
-            retry_attempts=self.config.get('rate_limit', {}).get('retry_attempts', 3),
-            retry_backoff_factor=self.config.get('rate_limit', {}).get('retry_backoff_factor', 2)
-        ) as client:
-            
-            if year_ranges:
-                # Year-balanced fetching
-                for start_year, end_year, target_records in year_ranges:
+        # Check for checkpoint
+        checkpoint = self.checkpoint_mgr.get_checkpoint('arxiv') or {}
+        state = checkpoint.get('metadata', {})
+        start_bin = 0
+        bin_offset = 0
+        bin_records = 0
+        if 'bin_idx' in state:
+            start_bin = state['bin_idx']
+            bin_offset = state.get('bin_offset', 0)
+            bin_records = state.get('bin_records', 0)
+            result['records_ingested'] = checkpoint.get('records_processed', 0)
+            logger.info(
+                f"Resuming from bin {start_bin} at offset {bin_offset} "
+                f"({result['records_ingested']} records already ingested)"
+            )
+        
+        try:
+            async with RetryableHTTPClient(
+                self.rate_limiter,
+                retry_attempts=self.config.get('rate_limit', {}).get('retry_attempts', 3),
+                retry_backoff_factor=self.config.get('rate_limit', {}).get('retry_backoff_factor', 2)
+            ) as client, BackgroundWriter(self.storage_mgr) as writer:
+                
+                for bin_idx in range(start_bin, len(bins)):
+                    query, target_records, description = bins[bin_idx]
+                    
                     if result['records_ingested'] >= self.max_records:
                         break
                     
-                    logger.info(f"Fetching arXiv records for years {start_year}-{end_year} (target: {target_records})")
+                    logger.info(f"Fetching arXiv records for {description} (target: {target_records})")
                     
-                    # arXiv API uses submittedDate for filtering
-                    # Format: YYYYMMDDHHMM
-                    date_from = f"{start_year}01010000"
-                    date_to = f"{end_year}12312359"
-                    
-                    # Add date filter to query
-                    query = f"({base_query}) AND submittedDate:[{date_from} TO {date_to}]"
-                    
-                    year_records = await self._fetch_records_for_query(
-                        client, query, target_records, result
+                    bin_fetched = await self._fetch_records_for_query(
+                        client, writer, query, target_records, result,
+                        bin_idx=bin_idx,
+                        start_offset=bin_offset,
+                        already_fetched=bin_records
                     )
                     
-                    logger.info(f"Fetched {year_records} records for years {start_year}-{end_year}")
-            else:
-                # Original behavior - fetch most recent
-                await self._fetch_records_for_query(
-                    client, base_query, self.max_records, result
-                )
+                    logger.info(f"Fetched {bin_fetched} records for {description}")
+                    
+                    # Bin complete: once its batches are written, a resume
+                    # starts at the next one
+                    await writer.after_pending(functools.partial(
+                        self.checkpoint_mgr.save_checkpoint,
+                        'arxiv',
+                        f"{bin_idx + 1}:0",
+                        result['records_ingested'],
+                        {'bin_idx': bin_idx + 1, 'bin_offset': 0, 'bin_records': 0}
+                    ))
+                    bin_offset = 0
+                    bin_records = 0
+            
+            # Update rate limit stats
+            result['rate_limit_stats'] = self.rate_limiter.get_stats()
+        finally:
+            # Persist any debounced checkpoint, even if ingestion was interrupted
+            self.checkpoint_mgr.flush('arxiv')
         
-        # Update rate limit stats
-        result['rate_limit_stats'] = self.rate_limiter.get_stats()
+        # Clear checkpoint on successful completion
+        if not result['errors']:
+            self.checkpoint_mgr.clear_checkpoint('arxiv')
         
         logger.info(f"arXiv ingestion complete: {result['records_ingested']} records")
         return result
@@ -269,30 +408,52 @@ class ArxivIngester:
     async def _fetch_records_for_query(
         self, 
         client: 'RetryableHTTPClient', 
+        writer: BackgroundWriter,
         query: str, 
         max_for_query: int,
-        result: dict[str, Any]
+        result: dict[str, Any],
+        bin_idx: int = 0,
+        start_offset: int = 0,
+        already_fetched: int = 0
     ) -> int:
-        """Fetch records for a specific query, up to max_for_query."""
-        query_records = 0
-        offset = 0
+        """
+        Fetch records for a specific query, up to max_for_query.
+        
+        Args:
+            client: HTTP client
+            writer: Background writer for record batches
+            query: arXiv search query
+            max_for_query: Target number of records for this query
+            result: Running ingestion result, updated in place
+            bin_idx: Index of the year bin, stored in checkpoints
+            start_offset: Offset to resume the query from
+            already_fetched: Records fetched for this query before resuming
+            
+        Returns:
+            Number of records fetched for this query, including resumed ones
+        """
+        query_records = already_fetched
+        offset = start_offset
         total_results = None
         
+        # Loop-invariant request params; only paging fields vary per page
+        base_params = {
+            'search_query': query,
+            'sortBy': 'relevance',  # Changed from submittedDate for better diversity
+            'sortOrder': 'descending'
+        }
+        
         while query_records < max_for_query and result['records_ingested'] < self.max_records:
             # Build request
             params = {
-                'search_query': query,
+                **base_params,
                 'start': offset,
                 'max_results': min(self.batch_size, max_for_query - query_records),
-                'sortBy': 'relevance',  # Changed from submittedDate for better diversity
-                'sortOrder': 'descending'
             }
             
             try:
                 logger.debug(f"Fetching arXiv records: offset={offset}")
-                response = await client.get(self.BASE_URL, params=params)
-                
-                records, total = self._parse_response(response.text)
+                records, total = await self._fetch_and_parse(client, params)
                 
                 if total_results is None:
                     total_results = total
@@ -302,29 +463,35 @@ class ArxivIngester:
                     logger.info("No more records available")
                     break
                 
-                # Write batch
+                # Write batch in the background; every few batches, checkpoint
+                # once it is on disk
                 batch_id = f"batch_{result['records_ingested']:08d}"
-                self.storage_mgr.write_records('arxiv', records, batch_id)
+                on_written = None
+                if (result['batches'] + 1) % self.checkpoint_interval == 0:
+                    on_written = functools.partial(
+                        self.checkpoint_mgr.save_checkpoint,
+                        'arxiv',
+                        f"{bin_idx}:{offset + len(records)}",
+                        result['records_ingested'] + len(records),
+                        {
+                            'bin_idx': bin_idx,
+                            'bin_offset': offset + len(records),
+                            'bin_records': query_records + len(records),
+                            'total_available': total_results or 0
+                        }
+                    )
+                await writer.submit('arxiv', records, batch_id, on_written=on_written)
                 
                 result['records_ingested'] += len(records)
                 result['batches'] += 1
                 query_records += len(records)
-                
-                # Save checkpoint
-                self.checkpoint_mgr.save_checkpoint(
-                    'arxiv',
-                    str(result['records_ingested']),
-                    result['records_ingested'],
-                    {'total_available': total_results or 0}
-                )
+                offset += len(records)
                 
                 logger.info(
                     f"arXiv progress: {result['records_ingested']}/{self.max_records} "
                     f"({100 * result['records_ingested'] / self.max_records:.1f}%)"
                 )
                 
-                offset += len(records)
-                
                 # Check if we've fetched all available
                 if total_results and offset >= total_results:
                     logger.info("Fetched all available records for this query")
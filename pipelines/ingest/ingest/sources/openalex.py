@@ -9,17 +9,39 @@ Fetches comprehensive scholarly data including:
 """
 
 import asyncio
+import functools
 import logging
 from datetime import datetime
 from typing import Any, Optional
 from urllib.parse import urlencode
 
+import orjson
+
 from ingest.utils.checkpoint import CheckpointManager
-from ingest.utils.storage import StorageManager
+from ingest.utils.storage import BackgroundWriter, StorageManager
 from ingest.utils.rate_limiter import RateLimiter, RetryableHTTPClient
 
 logger = logging.getLogger(__name__)
 
+# Prefix of OpenAlex entity URLs; records store the bare ID
+OPENALEX_ID_PREFIX = 'https://openalex.org/'
+
+# OpenAlex only serves the first 10,000 results through page/per-page paging
+PAGE_PAGING_LIMIT = 10000
+
+# Work fields requested from the API (the 'select' parameter)
+OPENALEX_SELECT = (
+    'id,doi,title,display_name,publication_year,publication_date,type,'
+    'cited_by_count,authorships,concepts,primary_location,'
+    'referenced_works,related_works,open_access,abstract_inverted_index,'
+    'cited_by_api_url'
+)
+
+
+def _short_id(url: Optional[str]) -> str:
+    """Strip the OpenAlex URL prefix from an entity ID."""
+    return url.removeprefix(OPENALEX_ID_PREFIX) if url else ''
+
 
 class OpenAlexIngester:
     """Ingester for OpenAlex API."""
@@ -55,6 +77,11 @@ class OpenAlexIngester:
         self.email = config.get('email', 'scholarly-graph@nyu.edu')
         self.filters = config.get('filters', {})
         self.fetch_citations = config.get('fetch_citations', True)
+        self.concurrency = max(1, config.get('concurrency', 8))
+        self.checkpoint_interval = max(1, config.get('checkpoint_interval', 5))
+        
+        # Depends only on config, so build it once
+        self._filter_string = self._build_filter_string()
     
     def _build_filter_string(self) -> str:
         """Build OpenAlex filter string."""
@@ -86,87 +113,91 @@ class OpenAlexIngester:
         
         return ','.join(filter_parts)
     
-    def _parse_work(self, work: dict[str, Any]) -> dict[str, Any]:
-        """Parse an OpenAlex work into a record."""
+    def _parse_work(self, work: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """
+        Parse an OpenAlex work into a record.
+        
+        Nullable nested fields are guarded with cheap checks rather than an
+        exception handler, so malformed works are skipped on the fast path.
+        The abstract is rebuilt here so the record is built in one go.
+        
+        Returns:
+            Parsed record, or None if the work has no ID
+        """
+        get = work.get
+        short_id = _short_id
         
         # Extract OpenAlex ID
-        openalex_id = work.get('id', '').replace('https://openalex.org/', '')
+        openalex_id = short_id(get('id'))
+        if not openalex_id:
+            return None
         
         # Parse authors
         authors = []
-        for authorship in work.get('authorships', []):
-            author = authorship.get('author', {})
-            
-            # Get affiliations
-            affiliations = []
-            for inst in authorship.get('institutions', []):
-                if inst.get('display_name'):
-                    affiliations.append(inst['display_name'])
+        for authorship in get('authorships') or ():
+            if not authorship:
+                continue
+            author = authorship.get('author') or {}
             
             authors.append({
-                'openalex_id': author.get('id', '').replace('https://openalex.org/', ''),
+                'openalex_id': short_id(author.get('id')),
                 'name': author.get('display_name'),
                 'orcid': author.get('orcid'),
                 'position': authorship.get('author_position'),
-                'affiliations': affiliations
+                'affiliations': [
+                    inst['display_name']
+                    for inst in authorship.get('institutions') or ()
+                    if inst and inst.get('display_name')
+                ]
             })
         
         # Parse concepts
-        concepts = []
-        for concept in work.get('concepts', []):
-            concepts.append({
-                'id': concept.get('id', '').replace('https://openalex.org/', ''),
+        concepts = [
+            {
+                'id': short_id(concept.get('id')),
                 'name': concept.get('display_name'),
                 'level': concept.get('level'),
                 'score': concept.get('score')
-            })
+            }
+            for concept in get('concepts') or ()
+            if concept
+        ]
         
         # Parse venue/location
         venue = None
-        primary_location = work.get('primary_location', {})
+        primary_location = get('primary_location')
         if primary_location:
-            source = primary_location.get('source', {})
+            source = primary_location.get('source')
             if source:
                 venue = {
-                    'id': source.get('id', '').replace('https://openalex.org/', ''),
+                    'id': short_id(source.get('id')),
                     'name': source.get('display_name'),
                     'type': source.get('type'),
                     'issn': source.get('issn_l')
                 }
         
-        # Parse citations (referenced works)
-        referenced_works = [
-            ref.replace('https://openalex.org/', '')
-            for ref in work.get('referenced_works', [])
-        ]
-        
-        # Parse related works
-        related_works = [
-            rel.replace('https://openalex.org/', '')
-            for rel in work.get('related_works', [])
-        ]
-        
         # Open access info
-        open_access = work.get('open_access', {})
+        open_access = get('open_access') or {}
         
         return {
             'openalex_id': openalex_id,
-            'doi': work.get('doi'),
-            'title': work.get('title') or work.get('display_name'),
-            'publication_year': work.get('publication_year'),
-            'publication_date': work.get('publication_date'),
-            'type': work.get('type'),
-            'cited_by_count': work.get('cited_by_count', 0),
+            'doi': get('doi'),
+            'title': get('title') or get('display_name'),
+            'publication_year': get('publication_year'),
+            'publication_date': get('publication_date'),
+            'type': get('type'),
+            'cited_by_count': get('cited_by_count', 0),
             'authors': authors,
             'concepts': concepts,
             'venue': venue,
-            'referenced_works': referenced_works,
-            'related_works': related_works,
+            # Citations (referenced works) and related works
+            'referenced_works': [short_id(ref) for ref in get('referenced_works') or () if ref],
+            'related_works': [short_id(rel) for rel in get('related_works') or () if rel],
             'is_oa': open_access.get('is_oa', False),
             'oa_status': open_access.get('oa_status'),
             'oa_url': open_access.get('oa_url'),
-            'abstract_inverted_index': work.get('abstract_inverted_index'),
-            'cited_by_api_url': work.get('cited_by_api_url')
+            'cited_by_api_url': get('cited_by_api_url'),
+            'abstract': self._reconstruct_abstract(get('abstract_inverted_index'))
         }
     
     def _reconstruct_abstract(self, inverted_index: Optional[dict]) -> Optional[str]:
@@ -175,146 +206,310 @@ class OpenAlexIngester:
             return None
         
         try:
-            # Build position -> word mapping
-            word_positions = []
+            # Positions are dense 0..N-1, so place words directly by index
+            # instead of sorting (position, word) pairs
+            max_pos = max(
+                (pos for positions in inverted_index.values() for pos in positions),
+                default=-1
+            )
+            words: list[Optional[str]] = [None] * (max_pos + 1)
             for word, positions in inverted_index.items():
                 for pos in positions:
-                    word_positions.append((pos, word))
+                    words[pos] = word
             
-            # Sort by position and join
-            word_positions.sort(key=lambda x: x[0])
-            return ' '.join(word for _, word in word_positions)
+            # Skip any gaps left by missing positions
+            return ' '.join(filter(None, words))
             
         except Exception as e:
             logger.warning(f"Failed to reconstruct abstract: {e}")
             return None
     
-    async def ingest(self) -> dict[str, Any]:
+    async def _fetch_page(
+        self,
+        client: RetryableHTTPClient,
+        filter_string: str,
+        page: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> dict[str, Any]:
+        """Fetch a single page of works, by page number or by cursor."""
+        params = {
+            'filter': filter_string,
+            'per-page': self.per_page,
+            'mailto': self.email,
+            'select': OPENALEX_SELECT
+        }
+        if cursor is not None:
+            params['cursor'] = cursor
+        else:
+            params['page'] = page
+        
+        logger.debug(f"Fetching OpenAlex page {page if cursor is None else cursor}")
+        response = await client.get(self.BASE_URL, params=params)
+        return orjson.loads(response.content)
+    
+    def _use_cursor_paging(self) -> bool:
+        """Decide between cursor paging and parallel page-number paging."""
+        pagination = self.config.get('pagination', 'auto')
+        if pagination == 'auto':
+            return self.max_records > PAGE_PAGING_LIMIT
+        return pagination == 'cursor'
+    
+    async def _process_page(
+        self,
+        writer: BackgroundWriter,
+        data: dict[str, Any],
+        works: list[dict[str, Any]],
+        page: int,
+        checkpoint_cursor: Optional[str],
+        checkpoint_metadata: dict[str, Any],
+        result: dict[str, Any]
+    ) -> None:
         """
-        Run the OpenAlex ingestion.
+        Parse one page of works and queue it for writing and checkpointing.
         
-        Returns:
-            Ingestion result summary
+        A ``checkpoint_cursor`` of None means there is nothing to resume
+        from (the last page), so no checkpoint is queued for this page.
         """
-        result = {
-            'source': 'openalex',
-            'records_ingested': 0,
-            'batches': 0,
-            'citations_count': 0,
-            'errors': [],
-            'rate_limit_stats': {}
-        }
+        # Parse works
+        records = []
+        for work in works[:self.max_records - result['records_ingested']]:
+            record = self._parse_work(work)
+            if record is None:
+                continue
+            
+            records.append(record)
+            
+            # Count citations
+            result['citations_count'] += len(record['referenced_works'])
+        
+        if not records:
+            return
+        
+        # Write batch in the background; every few pages, checkpoint once
+        # it is on disk (resuming re-fetches at most the pages in between)
+        batch_id = f"page_{page:06d}"
+        on_written = None
+        if (
+            checkpoint_cursor is not None
+            and (result['batches'] + 1) % self.checkpoint_interval == 0
+        ):
+            on_written = functools.partial(
+                self.checkpoint_mgr.save_checkpoint,
+                'openalex',
+                checkpoint_cursor,
+                result['records_ingested'] + len(records),
+                {
+                    'total_results': data.get('meta', {}).get('count'),
+                    'citations_count': result['citations_count'],
+                    **checkpoint_metadata
+                }
+            )
+        await writer.submit('openalex', records, batch_id, on_written=on_written)
         
-        # Check for checkpoint
-        records_processed, cursor = self.checkpoint_mgr.get_progress('openalex')
+        result['records_ingested'] += len(records)
+        result['batches'] += 1
         
-        async with RetryableHTTPClient(
-            self.rate_limiter,
-            retry_attempts=self.config.get('rate_limit', {}).get('retry_attempts', 3),
-            retry_backoff_factor=self.config.get('rate_limit', {}).get('retry_backoff_factor', 2)
-        ) as client:
+        logger.info(
+            f"OpenAlex progress: {result['records_ingested']}/{self.max_records} "
+            f"({100 * result['records_ingested'] / self.max_records:.1f}%) "
+            f"[{result['citations_count']} citations]"
+        )
+    
+    async def _ingest_by_page(
+        self,
+        client: RetryableHTTPClient,
+        writer: BackgroundWriter,
+        filter_string: str,
+        result: dict[str, Any],
+        checkpoint: dict[str, Any]
+    ) -> None:
+        """
+        Fetch pages by number, prefetching windows of pages concurrently.
+        
+        Pages are requested up to ``concurrency`` at a time (still throttled
+        by the rate limiter) and then written and checkpointed strictly in
+        page order.
+        """
+        page = 1
+        if checkpoint.get('cursor'):
+            page = int(checkpoint['cursor'])
+            logger.info(f"Resuming from page {page}")
+        
+        total_count = None
+        # Lowest page that failed; the checkpoint never moves past it
+        first_failed_page = None
+        done = False
+        
+        while not done:
+            # Check if we've reached the limit
+            remaining = self.max_records - result['records_ingested']
+            if remaining <= 0:
+                logger.info(f"Reached max records limit: {self.max_records}")
+                break
             
-            page = 1
-            if cursor:
-                page = int(cursor)
-                logger.info(f"Resuming from page {page}")
+            # The first request is issued alone to learn the total count;
+            # after that, only prefetch pages that can still be needed
+            if total_count is None:
+                window = 1
+            else:
+                last_page = -(-total_count // self.per_page)
+                window = min(
+                    self.concurrency,
+                    -(-remaining // self.per_page),
+                    last_page - page + 1
+                )
+                if window <= 0:
+                    logger.info("Fetched all available records")
+                    break
             
-            filter_string = self._build_filter_string()
+            pages = range(page, page + window)
+            responses = await asyncio.gather(
+                *(self._fetch_page(client, filter_string, page=p) for p in pages),
+                return_exceptions=True
+            )
             
-            while True:
-                # Check if we've reached the limit
-                if result['records_ingested'] >= self.max_records:
-                    logger.info(f"Reached max records limit: {self.max_records}")
-                    break
-                
+            for current_page, data in zip(pages, responses):
                 try:
-                    # Build request URL
-                    params = {
-                        'filter': filter_string,
-                        'page': page,
-                        'per-page': min(self.per_page, self.max_records - result['records_ingested']),
-                        'mailto': self.email,
-                        'select': 'id,doi,title,display_name,publication_year,publication_date,type,'
-                                  'cited_by_count,authorships,concepts,primary_location,'
-                                  'referenced_works,related_works,open_access,abstract_inverted_index,'
-                                  'cited_by_api_url'
-                    }
-                    
-                    logger.debug(f"Fetching OpenAlex page {page}")
-                    response = await client.get(self.BASE_URL, params=params)
-                    data = response.json()
+                    if isinstance(data, BaseException):
+                        raise data
                     
                     works = data.get('results', [])
                     
                     if not works:
                         logger.info("No more records available")
+                        done = True
                         break
                     
-                    # Parse works
-                    records = []
-                    for work in works:
-                        try:
-                            record = self._parse_work(work)
-                            
-                            # Reconstruct abstract
-                            record['abstract'] = self._reconstruct_abstract(
-                                record.pop('abstract_inverted_index', None)
-                            )
-                            
-                            records.append(record)
-                            
-                            # Count citations
-                            result['citations_count'] += len(record.get('referenced_works', []))
-                            
-                        except Exception as e:
-                            logger.warning(f"Failed to parse work: {e}")
-                            continue
-                    
-                    if records:
-                        # Write batch
-                        batch_id = f"page_{page:06d}"
-                        self.storage_mgr.write_records('openalex', records, batch_id)
-                        
-                        result['records_ingested'] += len(records)
-                        result['batches'] += 1
-                        
-                        # Save checkpoint
-                        self.checkpoint_mgr.save_checkpoint(
-                            'openalex',
-                            str(page + 1),
-                            result['records_ingested'],
-                            {
-                                'total_results': data.get('meta', {}).get('count'),
-                                'citations_count': result['citations_count']
-                            }
-                        )
-                        
-                        logger.info(
-                            f"OpenAlex progress: {result['records_ingested']}/{self.max_records} "
-                            f"({100 * result['records_ingested'] / self.max_records:.1f}%) "
-                            f"[{result['citations_count']} citations]"
-                        )
+                    await self._process_page(
+                        writer, data, works, current_page,
+                        str(first_failed_page or current_page + 1),
+                        {'pagination': 'page'},
+                        result
+                    )
                     
                     # Check if there are more pages
                     meta = data.get('meta', {})
                     total_count = meta.get('count', 0)
-                    current_offset = (page - 1) * self.per_page + len(works)
+                    current_offset = (current_page - 1) * self.per_page + len(works)
                     
                     if current_offset >= total_count:
                         logger.info("Fetched all available records")
+                        done = True
                         break
                     
-                    page += 1
+                    if result['records_ingested'] >= self.max_records:
+                        break
                         
                 except Exception as e:
-                    error_msg = f"Error on page {page}: {str(e)}"
+                    error_msg = f"Error on page {current_page}: {str(e)}"
                     logger.error(error_msg)
                     result['errors'].append(error_msg)
                     
+                    if first_failed_page is None:
+                        first_failed_page = current_page
+                    
                     # Continue with next page after error
-                    page += 1
+                    continue
             
-            result['rate_limit_stats'] = client.get_stats()
+            page += window
+    
+    async def _ingest_by_cursor(
+        self,
+        client: RetryableHTTPClient,
+        writer: BackgroundWriter,
+        filter_string: str,
+        result: dict[str, Any],
+        checkpoint: dict[str, Any]
+    ) -> None:
+        """
+        Fetch pages sequentially with cursor paging.
+        
+        Cursor paging has no result cap and no per-page offset cost, but each
+        request needs the cursor returned by the previous one.
+        """
+        cursor = checkpoint.get('cursor') or '*'
+        page = checkpoint.get('metadata', {}).get('page', 1)
+        if cursor != '*':
+            logger.info(f"Resuming from cursor at page {page}")
+        
+        while result['records_ingested'] < self.max_records:
+            try:
+                data = await self._fetch_page(client, filter_string, cursor=cursor)
+                works = data.get('results', [])
+                
+                if not works:
+                    logger.info("No more records available")
+                    break
+                
+                next_cursor = data.get('meta', {}).get('next_cursor')
+                await self._process_page(
+                    writer, data, works, page,
+                    next_cursor,
+                    {'pagination': 'cursor', 'page': page + 1},
+                    result
+                )
+                
+                if not next_cursor:
+                    logger.info("Fetched all available records")
+                    break
+                
+                cursor = next_cursor
+                page += 1
+                
+            except Exception as e:
+                error_msg = f"Error on page {page}: {str(e)}"
+                logger.error(error_msg)
+                result['errors'].append(error_msg)
+                
+                # The next cursor is only known from a successful response
+                break
+        else:
+            logger.info(f"Reached max records limit: {self.max_records}")
+    
+    async def ingest(self) -> dict[str, Any]:
+        """
+        Run the OpenAlex ingestion.
+        
+        Returns:
+            Ingestion result summary
+        """
+        result = {
+            'source': 'openalex',
+            'records_ingested': 0,
+            'batches': 0,
+            'citations_count': 0,
+            'errors': [],
+            'rate_limit_stats': {}
+        }
+        
+        # Check for checkpoint; resume in whichever mode wrote it. Cursor
+        # checkpoints always record their mode, so one without it is a
+        # page-number checkpoint (including those from older versions).
+        checkpoint = self.checkpoint_mgr.get_checkpoint('openalex') or {}
+        if not checkpoint:
+            use_cursor = self._use_cursor_paging()
+        else:
+            use_cursor = checkpoint.get('metadata', {}).get('pagination') == 'cursor'
+        
+        try:
+            async with RetryableHTTPClient(
+                self.rate_limiter,
+                retry_attempts=self.config.get('rate_limit', {}).get('retry_attempts', 3),
+                retry_backoff_factor=self.config.get('rate_limit', {}).get('retry_backoff_factor', 2),
+                http2=self.config.get('http2', True)
+            ) as client, BackgroundWriter(self.storage_mgr) as writer:
+                
+                filter_string = self._filter_string
+                
+                if use_cursor:
+                    await self._ingest_by_cursor(client, writer, filter_string, result, checkpoint)
+                else:
+                    await self._ingest_by_page(client, writer, filter_string, result, checkpoint)
+                
+                result['rate_limit_stats'] = client.get_stats()
+        finally:
+            # Persist any debounced checkpoint, even if ingestion was interrupted
+            self.checkpoint_mgr.flush('openalex')
         
         # Clear checkpoint on successful completion
         if not result['errors']:
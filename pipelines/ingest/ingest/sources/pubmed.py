@@ -8,18 +8,314 @@ Fetches biomedical literature metadata using NCBI E-utilities:
 """
 
 import asyncio
+import functools
 import logging
 import re
-from datetime import datetime
-from typing import Any, Optional
-from xml.etree import ElementTree as ET
+from typing import Any, Iterable, Optional
+from xml.parsers import expat
+
+from lxml import etree as LET
+from lxml.etree import XPath
 
 from ingest.utils.checkpoint import CheckpointManager
-from ingest.utils.storage import StorageManager
+from ingest.utils.storage import BackgroundWriter, StorageManager
 from ingest.utils.rate_limiter import RateLimiter, RetryableHTTPClient
 
 logger = logging.getLogger(__name__)
 
+# Read size when streaming EFetch bodies into the parser
+STREAM_CHUNK_SIZE = 65536
+
+# ESearch only yields a flat PMID list and a count, so scan for them
+# directly instead of building a tree. The first <Count> is the overall
+# total; later ones belong to the per-term translation stack.
+_ID_RE = re.compile(rb'<Id>(\d+)</Id>')
+_COUNT_RE = re.compile(rb'<Count>(\d+)</Count>')
+_WEBENV_RE = re.compile(rb'<WebEnv>([^<]+)</WebEnv>')
+_QUERY_KEY_RE = re.compile(rb'<QueryKey>(\d+)</QueryKey>')
+
+# PubDate months are often abbreviated names ("Mar") rather than numbers
+_MONTHS = {
+    name: number
+    for number, name in enumerate(
+        ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+         'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+        start=1
+    )
+}
+
+
+def _get_text(elem: Optional[LET._Element]) -> Optional[str]:
+    """Stripped text of an element, or None if it is missing or empty."""
+    return elem.text.strip() if elem is not None and elem.text else None
+
+
+def _format_pub_date(
+    year: Optional[str],
+    month: Optional[str],
+    day: Optional[str]
+) -> Optional[str]:
+    """Format PubDate parts as YYYY-MM-DD; month and day default to 01."""
+    if not year:
+        return None
+    
+    month = month or '01'
+    # Convert month name to number if needed
+    if not month.isdigit():
+        month = _MONTHS.get(month[:3].capitalize(), 1)
+    
+    return f"{year}-{int(month):02d}-{int(day or '01'):02d}"
+
+
+class _ExpatArticleParser:
+    """
+    Incremental EFetch parser built directly on expat.
+    
+    Produces the same records as ``PubMedIngester._parse_article`` without
+    creating an element object per XML node: it keeps a stack of open tags
+    and holds on to only the text of the fields it extracts. Feed it
+    response chunks, then call ``close()`` and read ``records``.
+    
+    Lookups that take the first match claim it when the element starts, and
+    list fields reserve their slot then too, so results follow document
+    order exactly as the XPath lookups do.
+    """
+    
+    def __init__(self):
+        self.records: list[dict[str, Any]] = []
+        
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._characters
+        # Comments and PIs are nodes in lxml, so they end an element's .text
+        self._parser.CommentHandler = self._stop_text
+        self._parser.ProcessingInstructionHandler = self._stop_text
+        
+        # Open elements as [tag, text parts, collecting text, on_end, data];
+        # like ElementTree's .text, only text before the first child counts
+        self._stack: list[list[Any]] = []
+        self._reset_article()
+        self._in_pubmed_article = False
+    
+    def feed(self, data: bytes) -> None:
+        """Parse the next chunk of the response."""
+        self._parser.Parse(data, False)
+    
+    def close(self) -> None:
+        """Finish parsing; raises ExpatError if the document is incomplete."""
+        self._parser.Parse(b'', True)
+    
+    def _reset_article(self) -> None:
+        """Start collecting fields for a new PubmedArticle."""
+        self._in_pubmed_article = True
+        self._fields: dict[str, Any] = {
+            'pmid': None, 'title': None, 'journal': None
+        }
+        self._claimed: set[str] = set()
+        self._article_open = False
+        self._journal_depth = 0
+        self._article_date: Optional[dict[str, Optional[str]]] = None
+        self._pub_date: Optional[dict[str, Optional[str]]] = None
+        self._abstract_parts: list[Optional[str]] = []
+        self._authors: list[Optional[dict[str, Any]]] = []
+        self._mesh_terms: list[Optional[dict[str, Any]]] = []
+        self._keywords: list[Optional[str]] = []
+        self._dois: list[Optional[str]] = []
+        self._pmc_ids: list[Optional[str]] = []
+    
+    def _characters(self, data: str) -> None:
+        if self._stack and self._stack[-1][2]:
+            self._stack[-1][1].append(data)
+    
+    def _stop_text(self, *args: Any) -> None:
+        if self._stack:
+            self._stack[-1][2] = False
+    
+    def _claim(self, field: str) -> bool:
+        """Claim a first-match field; False if an earlier element has it."""
+        if field in self._claimed:
+            return False
+        self._claimed.add(field)
+        return True
+    
+    @staticmethod
+    def _slot(values: list) -> int:
+        """Reserve the next position in a list field."""
+        values.append(None)
+        return len(values) - 1
+    
+    def _start(self, tag: str, attrs: dict[str, str]) -> None:
+        stack = self._stack
+        parent = stack[-1] if stack else None
+        if parent is not None:
+            parent[2] = False
+        entry = [tag, [], False, None, None]
+        stack.append(entry)
+        
+        if tag == 'PubmedArticle':
+            self._reset_article()
+        elif self._in_pubmed_article:
+            self._match_field(tag, attrs, parent, entry)
+            # Only keep text for elements that feed a field
+            entry[2] = entry[3] is not None
+    
+    def _match_field(
+        self,
+        tag: str,
+        attrs: dict[str, str],
+        parent: list[Any],
+        entry: list[Any]
+    ) -> None:
+        """Decide what, if anything, an element inside an article feeds."""
+        parent_tag = parent[0]
+        
+        # Fields looked up anywhere in the PubmedArticle
+        if tag == 'PMID':
+            if self._claim('pmid'):
+                entry[3] = ('field', 'pmid', False)
+        elif tag == 'PubDate':
+            if self._pub_date is None:
+                entry[4] = self._pub_date = {}
+        elif tag in ('Year', 'Month', 'Day'):
+            if parent_tag in ('PubDate', 'ArticleDate') and parent[4] is not None:
+                entry[3] = ('date', parent[4])
+        elif tag == 'DescriptorName':
+            if parent_tag == 'MeshHeading':
+                entry[3] = ('mesh', self._slot(self._mesh_terms), attrs)
+        elif tag == 'Keyword':
+            if parent_tag == 'KeywordList':
+                entry[3] = ('keyword', self._slot(self._keywords))
+        elif tag == 'ArticleId':
+            if parent_tag == 'ArticleIdList':
+                id_type = attrs.get('IdType')
+                if id_type == 'doi':
+                    entry[3] = ('id', self._dois, self._slot(self._dois))
+                elif id_type == 'pmc':
+                    entry[3] = ('id', self._pmc_ids, self._slot(self._pmc_ids))
+        elif tag == 'Article':
+            if self._claim('article'):
+                self._article_open = True
+                entry[3] = ('article_end',)
+        
+        # Fields looked up within the first Article
+        elif not self._article_open:
+            return
+        elif tag == 'ArticleTitle':
+            if self._claim('title'):
+                entry[3] = ('field', 'title', True)
+        elif tag == 'AbstractText':
+            if parent_tag == 'Abstract':
+                entry[3] = ('abstract', self._slot(self._abstract_parts), attrs.get('Label'))
+        elif tag == 'Journal':
+            self._journal_depth += 1
+            entry[3] = ('journal_end',)
+        elif tag == 'Title':
+            if self._journal_depth and self._claim('journal'):
+                entry[3] = ('field', 'journal', True)
+        elif tag == 'ArticleDate':
+            if self._article_date is None:
+                entry[4] = self._article_date = {}
+        elif tag == 'Author':
+            if parent_tag == 'AuthorList':
+                entry[4] = {'last': None, 'fore': None, 'affiliation': None}
+                entry[3] = ('author', self._slot(self._authors))
+        elif tag in ('LastName', 'ForeName'):
+            if parent_tag == 'Author' and parent[4] is not None:
+                entry[3] = ('author_name', parent[4], 'last' if tag == 'LastName' else 'fore')
+        elif tag == 'AffiliationInfo':
+            if parent_tag == 'Author' and parent[4] is not None:
+                # Only its first Affiliation counts, and only while the
+                # author has no affiliation yet
+                entry[4] = parent[4]
+        elif tag == 'Affiliation':
+            if parent_tag == 'AffiliationInfo' and parent[4] is not None:
+                author = parent[4]
+                parent[4] = None
+                if author['affiliation'] is None:
+                    entry[3] = ('affiliation', author)
+    
+    def _end(self, tag: str) -> None:
+        _, parts, _, on_end, data = self._stack.pop()
+        
+        if tag == 'PubmedArticle':
+            if self._in_pubmed_article:
+                self._in_pubmed_article = False
+                self._finish_article()
+            return
+        if on_end is None:
+            return
+        
+        raw = ''.join(parts) or None
+        kind = on_end[0]
+        
+        if kind == 'field':
+            _, field, strip = on_end
+            self._fields[field] = (raw.strip() if raw else None) if strip else raw
+        elif kind == 'date':
+            on_end[1][tag] = raw.strip() if raw else None
+        elif kind == 'mesh':
+            _, index, attrs = on_end
+            if raw:
+                self._mesh_terms[index] = {
+                    'term': raw,
+                    'ui': attrs.get('UI'),
+                    'major_topic': attrs.get('MajorTopicYN') == 'Y'
+                }
+        elif kind == 'keyword':
+            if raw:
+                self._keywords[on_end[1]] = raw
+        elif kind == 'id':
+            _, values, index = on_end
+            values[index] = raw
+        elif kind == 'article_end':
+            self._article_open = False
+        elif kind == 'abstract':
+            _, index, label = on_end
+            self._abstract_parts[index] = (f"{label}: " if label else '') + (raw or '')
+        elif kind == 'journal_end':
+            self._journal_depth -= 1
+        elif kind == 'author':
+            if data['last']:
+                last_name, fore_name = data['last'], data['fore']
+                self._authors[on_end[1]] = {
+                    'name': f"{fore_name} {last_name}" if fore_name else last_name,
+                    'affiliation': data['affiliation']
+                }
+        elif kind == 'author_name':
+            on_end[1][on_end[2]] = raw.strip() if raw else None
+        elif kind == 'affiliation':
+            on_end[1]['affiliation'] = raw
+    
+    def _finish_article(self) -> None:
+        """Emit the record for the PubmedArticle that just ended."""
+        if 'pmid' not in self._claimed or 'article' not in self._claimed:
+            return
+        
+        date = self._article_date if self._article_date is not None else self._pub_date
+        try:
+            pub_date = _format_pub_date(
+                date.get('Year'), date.get('Month'), date.get('Day')
+            ) if date is not None else None
+        except ValueError as e:
+            logger.warning("Failed to parse PubMed article: %s", e)
+            return
+        
+        fields = self._fields
+        self.records.append({
+            'pmid': fields['pmid'],
+            'title': fields['title'],
+            'abstract': ' '.join(self._abstract_parts) if self._abstract_parts else None,
+            'authors': [author for author in self._authors if author is not None],
+            'journal': fields['journal'],
+            'pub_date': pub_date,
+            'mesh_terms': [term for term in self._mesh_terms if term is not None],
+            'keywords': [keyword for keyword in self._keywords if keyword is not None],
+            'doi': next((doi for doi in self._dois if doi is not None), None),
+            'pmc_id': next((pmc_id for pmc_id in self._pmc_ids if pmc_id is not None), None)
+        })
+
 
 class PubMedIngester:
     """Ingester for PubMed E-utilities."""
@@ -27,6 +323,19 @@ class PubMedIngester:
     ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
     EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
     
+    # Article field lookups, compiled once and shared by every article
+    _XP_PMID = XPath('.//PMID')
+    _XP_ARTICLE = XPath('.//Article')
+    _XP_TITLE = XPath('.//ArticleTitle')
+    _XP_ABSTRACT = XPath('.//Abstract/AbstractText')
+    _XP_AUTHOR = XPath('.//AuthorList/Author')
+    _XP_JOURNAL_TITLE = XPath('.//Journal//Title')
+    _XP_ARTICLE_DATE = XPath('.//ArticleDate')
+    _XP_PUB_DATE = XPath('.//PubDate')
+    _XP_MESH = XPath('.//MeshHeading/DescriptorName')
+    _XP_KEYWORD = XPath('.//KeywordList/Keyword')
+    _XP_ARTICLE_IDS = XPath('.//ArticleIdList/ArticleId')
+    
     def __init__(
         self,
         config: dict[str, Any],
@@ -53,74 +362,83 @@ class PubMedIngester:
         )
         
         self.max_records = config.get('max_records', 1000)
-        self.batch_size = config.get('batch_size', 100)
+        # PMIDs per ESearch page and EFetch request; EFetch is POSTed, so
+        # large id lists are not limited by URL length
+        self.batch_size = config.get('batch_size', 500)
         self.search_terms = config.get('search_terms', ['machine learning'])
         self.api_key = config.get('api_key')
+        # ESearch/EFetch rounds kept in flight at once (still rate limited)
+        self.concurrency = max(1, config.get('concurrency', 4))
+        # EFetch parser: 'lxml' (element tree) or 'sax' (expat, no elements)
+        self.parser = config.get('parser', 'lxml')
+        
+        # History server session (WebEnv, query_key) from the first search
+        self._history: Optional[tuple[str, str]] = None
+        
+        # Depends only on config, so build it once
+        self._query = self._build_search_query()
     
     def _build_search_query(self) -> str:
         """Build PubMed search query from terms."""
         terms = [f'"{term}"[Title/Abstract]' for term in self.search_terms]
         return " OR ".join(terms)
     
-    def _parse_search_response(self, xml_content: str) -> tuple[list[str], int]:
+    def _parse_search_response(self, xml_content: bytes) -> tuple[list[str], int]:
         """
         Parse ESearch response.
         
         Returns:
             Tuple of (PMID list, total count)
         """
-        root = ET.fromstring(xml_content)
+        count_match = _COUNT_RE.search(xml_content)
+        total_count = int(count_match.group(1)) if count_match else 0
         
-        count_elem = root.find('.//Count')
-        total_count = int(count_elem.text) if count_elem is not None else 0
-        
-        pmids = [id_elem.text for id_elem in root.findall('.//Id') if id_elem.text]
+        pmids = [match.group(1).decode('ascii') for match in _ID_RE.finditer(xml_content)]
         
         return pmids, total_count
     
-    def _parse_article(self, article: ET.Element) -> Optional[dict[str, Any]]:
+    def _parse_article(self, article: LET._Element) -> Optional[dict[str, Any]]:
         """Parse a PubMed article element."""
-        
-        def get_text(elem: Optional[ET.Element]) -> Optional[str]:
-            return elem.text.strip() if elem is not None and elem.text else None
-        
         try:
             # Get PMID
-            pmid_elem = article.find('.//PMID')
-            if pmid_elem is None:
+            pmid_elems = self._XP_PMID(article)
+            if not pmid_elems:
                 return None
-            pmid = pmid_elem.text
+            pmid = pmid_elems[0].text
             
             # Get article metadata
-            article_meta = article.find('.//Article')
-            if article_meta is None:
+            article_metas = self._XP_ARTICLE(article)
+            if not article_metas:
                 return None
+            article_meta = article_metas[0]
             
             # Title
-            title_elem = article_meta.find('.//ArticleTitle')
-            title = get_text(title_elem)
+            title_elems = self._XP_TITLE(article_meta)
+            title = _get_text(title_elems[0]) if title_elems else None
             
             # Abstract
-            abstract_parts = []
-            for abstract_elem in article_meta.findall('.//Abstract/AbstractText'):
-                label = abstract_elem.get('Label', '')
-                text = abstract_elem.text or ''
-                if label:
-                    abstract_parts.append(f"{label}: {text}")
-                else:
-                    abstract_parts.append(text)
+            abstract_parts = [
+                (f"{elem.get('Label')}: " if elem.get('Label') else '') + (elem.text or '')
+                for elem in self._XP_ABSTRACT(article_meta)
+            ]
             abstract = ' '.join(abstract_parts) if abstract_parts else None
             
             # Authors
             authors = []
-            for author_elem in article_meta.findall('.//AuthorList/Author'):
-                last_name = get_text(author_elem.find('LastName'))
-                fore_name = get_text(author_elem.find('ForeName'))
-                
-                affiliation = None
-                affil_elem = author_elem.find('.//Affiliation')
-                if affil_elem is not None:
-                    affiliation = affil_elem.text
+            for author_elem in self._XP_AUTHOR(article_meta):
+                # Name parts and affiliations are direct children, so one
+                # scan of them replaces a search per field
+                last_name = fore_name = affiliation = None
+                for child in author_elem:
+                    tag = child.tag
+                    if tag == 'LastName':
+                        last_name = _get_text(child)
+                    elif tag == 'ForeName':
+                        fore_name = _get_text(child)
+                    elif tag == 'AffiliationInfo' and affiliation is None:
+                        affil_elem = child.find('Affiliation')
+                        if affil_elem is not None:
+                            affiliation = affil_elem.text
                 
                 if last_name:
                     name = f"{fore_name} {last_name}" if fore_name else last_name
@@ -130,61 +448,51 @@ class PubMedIngester:
                     })
             
             # Journal
-            journal_elem = article_meta.find('.//Journal')
-            journal = None
-            if journal_elem is not None:
-                journal_title = journal_elem.find('.//Title')
-                journal = get_text(journal_title)
+            journal_titles = self._XP_JOURNAL_TITLE(article_meta)
+            journal = _get_text(journal_titles[0]) if journal_titles else None
             
             # Publication date
             pub_date = None
-            date_elem = article_meta.find('.//ArticleDate')
-            if date_elem is None:
-                date_elem = article.find('.//PubDate')
+            date_elems = self._XP_ARTICLE_DATE(article_meta) or self._XP_PUB_DATE(article)
             
-            if date_elem is not None:
-                year = get_text(date_elem.find('Year'))
-                month = get_text(date_elem.find('Month')) or '01'
-                day = get_text(date_elem.find('Day')) or '01'
-                
-                # Convert month name to number if needed
-                if month and not month.isdigit():
-                    try:
-                        month = datetime.strptime(month[:3], '%b').month
-                    except ValueError:
-                        month = 1
-                
-                if year:
-                    pub_date = f"{year}-{int(month):02d}-{int(day):02d}"
+            if date_elems:
+                year = month = day = None
+                for child in date_elems[0]:
+                    tag = child.tag
+                    if tag == 'Year':
+                        year = _get_text(child)
+                    elif tag == 'Month':
+                        month = _get_text(child)
+                    elif tag == 'Day':
+                        day = _get_text(child)
+                pub_date = _format_pub_date(year, month, day)
             
             # MeSH terms
-            mesh_terms = []
-            for mesh_elem in article.findall('.//MeshHeading/DescriptorName'):
-                if mesh_elem.text:
-                    mesh_terms.append({
-                        'term': mesh_elem.text,
-                        'ui': mesh_elem.get('UI'),
-                        'major_topic': mesh_elem.get('MajorTopicYN') == 'Y'
-                    })
+            mesh_terms = [
+                {
+                    'term': mesh_elem.text,
+                    'ui': mesh_elem.get('UI'),
+                    'major_topic': mesh_elem.get('MajorTopicYN') == 'Y'
+                }
+                for mesh_elem in self._XP_MESH(article)
+                if mesh_elem.text
+            ]
             
             # Keywords
-            keywords = []
-            for kw_elem in article.findall('.//KeywordList/Keyword'):
-                if kw_elem.text:
-                    keywords.append(kw_elem.text)
+            keywords = [kw_elem.text for kw_elem in self._XP_KEYWORD(article) if kw_elem.text]
             
-            # DOI
+            # DOI and PMC ID, from a single scan of the article IDs
             doi = None
-            for id_elem in article.findall('.//ArticleIdList/ArticleId'):
-                if id_elem.get('IdType') == 'doi':
-                    doi = id_elem.text
-                    break
-            
-            # PMC ID
             pmc_id = None
-            for id_elem in article.findall('.//ArticleIdList/ArticleId'):
-                if id_elem.get('IdType') == 'pmc':
-                    pmc_id = id_elem.text
+            for id_elem in self._XP_ARTICLE_IDS(article):
+                id_type = id_elem.get('IdType')
+                if id_type == 'doi':
+                    if doi is None:
+                        doi = id_elem.text
+                elif id_type == 'pmc':
+                    if pmc_id is None:
+                        pmc_id = id_elem.text
+                if doi is not None and pmc_id is not None:
                     break
             
             return {
@@ -201,25 +509,29 @@ class PubMedIngester:
             }
             
         except Exception as e:
-            logger.warning(f"Failed to parse PubMed article: {e}")
+            logger.warning("Failed to parse PubMed article: %s", e)
             return None
     
-    def _parse_fetch_response(self, xml_content: str) -> list[dict[str, Any]]:
-        """Parse EFetch response."""
-        records = []
+    def _consume_articles(
+        self,
+        events: Iterable[tuple[str, LET._Element]],
+        records: list[dict[str, Any]]
+    ) -> None:
+        """
+        Parse streamed PubmedArticle elements into records.
         
-        try:
-            root = ET.fromstring(xml_content)
+        Each article is cleared (along with already-processed siblings) once
+        parsed, so memory stays proportional to one article rather than the
+        whole batch.
+        """
+        for _, article in events:
+            record = self._parse_article(article)
+            if record:
+                records.append(record)
             
-            for article in root.findall('.//PubmedArticle'):
-                record = self._parse_article(article)
-                if record:
-                    records.append(record)
-                    
-        except ET.ParseError as e:
-            logger.error(f"Failed to parse PubMed response: {e}")
-        
-        return records
+            article.clear(keep_tail=True)
+            while article.getprevious() is not None:
+                del article.getparent()[0]
     
     async def _search_pmids(
         self,
@@ -228,28 +540,53 @@ class PubMedIngester:
         retstart: int,
         retmax: int
     ) -> tuple[list[str], int]:
-        """Search for PMIDs."""
+        """
+        Search for PMIDs.
+        
+        The first search runs the query with ``usehistory=y``; later searches
+        page through that stored result set by reference (``#<query_key>``)
+        so the server does not re-run the full query for every offset. The
+        form is POSTed to keep the long OR-joined query out of the URL.
+        """
         params = {
             'db': 'pubmed',
             'term': query,
             'retstart': retstart,
             'retmax': retmax,
             'retmode': 'xml',
-            'usehistory': 'n'
+            'usehistory': 'y'
         }
         
+        if self._history:
+            params['WebEnv'], query_key = self._history
+            params['term'] = f"#{query_key}"
+        
         if self.api_key:
             params['api_key'] = self.api_key
         
-        response = await client.get(self.ESEARCH_URL, params=params)
-        return self._parse_search_response(response.text)
+        response = await client.post(self.ESEARCH_URL, data=params)
+        content = response.content
+        
+        if self._history is None:
+            web_env = _WEBENV_RE.search(content)
+            query_key = _QUERY_KEY_RE.search(content)
+            if web_env and query_key:
+                self._history = (web_env.group(1).decode(), query_key.group(1).decode())
+        
+        return self._parse_search_response(content)
     
     async def _fetch_articles(
         self,
         client: RetryableHTTPClient,
         pmids: list[str]
     ) -> list[dict[str, Any]]:
-        """Fetch article metadata for PMIDs."""
+        """
+        Fetch article metadata for PMIDs.
+        
+        The id list is POSTed, since a few hundred PMIDs overflow a GET URL.
+        The body is fed to the parser as it arrives, so parsing overlaps the
+        download and the full payload is never held in memory.
+        """
         params = {
             'db': 'pubmed',
             'id': ','.join(pmids),
@@ -260,8 +597,47 @@ class PubMedIngester:
         if self.api_key:
             params['api_key'] = self.api_key
         
-        response = await client.get(self.EFETCH_URL, params=params)
-        return self._parse_fetch_response(response.text)
+        if self.parser == 'sax':
+            sax_parser = _ExpatArticleParser()
+            records = sax_parser.records
+        else:
+            parser = LET.XMLPullParser(events=('end',), tag='PubmedArticle')
+            records = []
+        
+        async with client.stream('POST', self.EFETCH_URL, data=params) as response:
+            try:
+                if self.parser == 'sax':
+                    async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                        sax_parser.feed(chunk)
+                    sax_parser.close()
+                else:
+                    async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                        parser.feed(chunk)
+                        self._consume_articles(parser.read_events(), records)
+                    
+                    parser.close()
+                    self._consume_articles(parser.read_events(), records)
+            except (LET.XMLSyntaxError, expat.ExpatError) as e:
+                logger.error("Failed to parse PubMed response: %s", e)
+        
+        return records
+    
+    async def _fetch_batch(
+        self,
+        client: RetryableHTTPClient,
+        query: str,
+        retstart: int,
+        retmax: int
+    ) -> tuple[list[str], int, list[dict[str, Any]]]:
+        """
+        Search one offset and fetch metadata for the PMIDs it returns.
+        
+        Returns:
+            Tuple of (PMID list, total count, parsed records)
+        """
+        pmids, total = await self._search_pmids(client, query, retstart, retmax)
+        records = await self._fetch_articles(client, pmids) if pmids else []
+        return pmids, total, records
     
     async def ingest(self) -> dict[str, Any]:
         """
@@ -283,79 +659,127 @@ class PubMedIngester:
         start_offset = int(cursor) if cursor else 0
         
         if start_offset > 0:
-            logger.info(f"Resuming from offset {start_offset}")
+            logger.info("Resuming from offset %d", start_offset)
         
-        query = self._build_search_query()
-        logger.info(f"PubMed query: {query}")
+        query = self._query
+        logger.info("PubMed query: %s", query)
         
-        async with RetryableHTTPClient(
-            self.rate_limiter,
-            retry_attempts=self.config.get('rate_limit', {}).get('retry_attempts', 3),
-            retry_backoff_factor=self.config.get('rate_limit', {}).get('retry_backoff_factor', 2)
-        ) as client:
-            
-            offset = start_offset
-            total_results = None
-            
-            while True:
-                # Check if we've reached the limit
-                if result['records_ingested'] >= self.max_records:
-                    logger.info(f"Reached max records limit: {self.max_records}")
-                    break
+        # History sessions expire server-side, so each run starts a new one
+        self._history = None
+        
+        try:
+            async with RetryableHTTPClient(
+                self.rate_limiter,
+                retry_attempts=self.config.get('rate_limit', {}).get('retry_attempts', 3),
+                retry_backoff_factor=self.config.get('rate_limit', {}).get('retry_backoff_factor', 2),
+                http2=self.config.get('http2', True)
+            ) as client, BackgroundWriter(self.storage_mgr) as writer:
                 
-                try:
-                    # Search for PMIDs
-                    batch_size = min(self.batch_size, self.max_records - result['records_ingested'])
-                    pmids, total = await self._search_pmids(client, query, offset, batch_size)
-                    
-                    if total_results is None:
-                        total_results = total
-                        logger.info(f"Total available records: {total_results}")
-                    
-                    if not pmids:
-                        logger.info("No more records available")
+                offset = start_offset
+                total_results = None
+                # Lowest offset that failed; the checkpoint never moves past it
+                first_failed_offset = None
+                done = False
+                
+                while not done:
+                    # Check if we've reached the limit
+                    remaining = self.max_records - result['records_ingested']
+                    if remaining <= 0:
+                        logger.info("Reached max records limit: %d", self.max_records)
                         break
                     
-                    # Fetch full metadata
-                    records = await self._fetch_articles(client, pmids)
-                    
-                    if records:
-                        # Write batch
-                        batch_id = f"batch_{offset:08d}"
-                        self.storage_mgr.write_records('pubmed', records, batch_id)
-                        
-                        result['records_ingested'] += len(records)
-                        result['batches'] += 1
-                        
-                        # Save checkpoint
-                        self.checkpoint_mgr.save_checkpoint(
-                            'pubmed',
-                            str(offset + len(pmids)),
-                            result['records_ingested'],
-                            {'total_available': total_results}
-                        )
-                        
-                        logger.info(
-                            f"PubMed progress: {result['records_ingested']}/{self.max_records} "
-                            f"({100 * result['records_ingested'] / self.max_records:.1f}%)"
-                        )
-                    
-                    offset += len(pmids)
-                    
-                    # Check if we've fetched all available
-                    if offset >= total_results:
+                    # The first search is issued alone to learn the total count;
+                    # after that, keep a window of offsets in flight
+                    window_end = offset + remaining
+                    if total_results is not None:
+                        window_end = min(window_end, total_results)
+                    offsets = list(range(offset, window_end, self.batch_size))
+                    offsets = offsets[:1 if total_results is None else self.concurrency]
+                    if not offsets:
                         logger.info("Fetched all available records")
                         break
-                        
-                except Exception as e:
-                    error_msg = f"Error at offset {offset}: {str(e)}"
-                    logger.error(error_msg)
-                    result['errors'].append(error_msg)
                     
-                    # Continue with next batch after error
-                    offset += self.batch_size
-            
-            result['rate_limit_stats'] = client.get_stats()
+                    batch_sizes = [min(self.batch_size, window_end - off) for off in offsets]
+                    responses = await asyncio.gather(
+                        *(
+                            self._fetch_batch(client, query, off, size)
+                            for off, size in zip(offsets, batch_sizes)
+                        ),
+                        return_exceptions=True
+                    )
+                    
+                    # Write and checkpoint strictly in offset order
+                    for off, size, response in zip(offsets, batch_sizes, responses):
+                        try:
+                            if isinstance(response, BaseException):
+                                raise response
+                            
+                            pmids, total, records = response
+                            
+                            if total_results is None:
+                                total_results = total
+                                logger.info("Total available records: %d", total_results)
+                            
+                            if not pmids:
+                                logger.info("No more records available")
+                                done = True
+                                break
+                            
+                            if records:
+                                # Write batch in the background; checkpoint once
+                                # it is on disk
+                                batch_id = f"batch_{off:08d}"
+                                checkpoint_offset = (
+                                    off + len(pmids) if first_failed_offset is None
+                                    else first_failed_offset
+                                )
+                                await writer.submit(
+                                    'pubmed', records, batch_id,
+                                    on_written=functools.partial(
+                                        self.checkpoint_mgr.save_checkpoint,
+                                        'pubmed',
+                                        str(checkpoint_offset),
+                                        result['records_ingested'] + len(records),
+                                        {'total_available': total_results}
+                                    )
+                                )
+                                
+                                result['records_ingested'] += len(records)
+                                result['batches'] += 1
+                                
+                                # Report every 10 batches to keep large runs' logs short
+                                if (result['batches'] % 10 == 0
+                                        or result['records_ingested'] >= self.max_records):
+                                    logger.info(
+                                        "PubMed progress: %d/%d (%.1f%%)",
+                                        result['records_ingested'],
+                                        self.max_records,
+                                        100 * result['records_ingested'] / self.max_records
+                                    )
+                            
+                            offset = off + len(pmids)
+                            
+                            # Check if we've fetched all available
+                            if offset >= total_results:
+                                logger.info("Fetched all available records")
+                                done = True
+                                break
+                            
+                        except Exception as e:
+                            error_msg = f"Error at offset {off}: {str(e)}"
+                            logger.error(error_msg)
+                            result['errors'].append(error_msg)
+                            
+                            if first_failed_offset is None:
+                                first_failed_offset = off
+                            
+                            # Continue with next batch after error
+                            offset = off + size
+                
+                result['rate_limit_stats'] = client.get_stats()
+        finally:
+            # Persist any debounced checkpoint, even if ingestion was interrupted
+            self.checkpoint_mgr.flush('pubmed')
         
         # Clear checkpoint on successful completion
         if not result['errors']:
@@ -1,8 +1,8 @@
 """Utility modules for the ingestion pipeline."""
 
 from ingest.utils.checkpoint import CheckpointManager
-from ingest.utils.storage import StorageManager
+from ingest.utils.storage import BackgroundWriter, StorageManager
 from ingest.utils.rate_limiter import RateLimiter
 
-__all__ = ['CheckpointManager', 'StorageManager', 'RateLimiter']
+__all__ = ['BackgroundWriter', 'CheckpointManager', 'StorageManager', 'RateLimiter']
 
@@ -7,28 +7,37 @@ Provides persistent state tracking to enable:
 - Progress tracking
 """
 
-import json
 import logging
+import os
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
 class CheckpointManager:
     """Manages checkpoints for resumable ingestion."""
     
-    def __init__(self, checkpoint_dir: str):
+    def __init__(self, checkpoint_dir: str, flush_interval: float = 5.0):
         """
         Initialize the checkpoint manager.
         
         Args:
             checkpoint_dir: Directory to store checkpoint files
+            flush_interval: Minimum seconds between checkpoint writes per
+                source; saves in between only update memory until the next
+                write or ``flush()``
         """
         self.checkpoint_dir = Path(checkpoint_dir)
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
         self._cache: dict[str, dict[str, Any]] = {}
+        self._last_flush: dict[str, float] = {}
+        self._pending: set[str] = set()
     
     def _get_checkpoint_path(self, source: str) -> Path:
         """Get the checkpoint file path for a source."""
@@ -53,12 +62,11 @@ class CheckpointManager:
             return None
             
         try:
-            with open(checkpoint_path, 'r') as f:
-                checkpoint = json.load(f)
-                self._cache[source] = checkpoint
-                return checkpoint
-        except (json.JSONDecodeError, IOError) as e:
-            logger.warning(f"Failed to load checkpoint for {source}: {e}")
+            checkpoint = orjson.loads(checkpoint_path.read_bytes())
+            self._cache[source] = checkpoint
+            return checkpoint
+        except (orjson.JSONDecodeError, IOError) as e:
+            logger.warning("Failed to load checkpoint for %s: %s", source, e)
             return None
     
     def save_checkpoint(
@@ -84,23 +92,51 @@ class CheckpointManager:
             'last_updated': datetime.utcnow().isoformat(),
             'metadata': metadata or {}
         }
+        self._cache[source] = checkpoint
+        
+        # Debounce disk writes; the latest state is written on the next
+        # save after the interval, or by flush()
+        last_flush = self._last_flush.get(source)
+        if last_flush is not None and time.monotonic() - last_flush < self.flush_interval:
+            self._pending.add(source)
+            return
         
+        self._write_checkpoint(source)
+    
+    def _write_checkpoint(self, source: str) -> None:
+        """Write the cached checkpoint for a source to disk."""
+        checkpoint = self._cache[source]
         checkpoint_path = self._get_checkpoint_path(source)
         
         try:
             # Write atomically using temp file
             temp_path = checkpoint_path.with_suffix('.tmp')
-            with open(temp_path, 'w') as f:
-                json.dump(checkpoint, f, indent=2)
-            temp_path.rename(checkpoint_path)
+            temp_path.write_bytes(orjson.dumps(checkpoint))
+            os.replace(temp_path, checkpoint_path)
             
-            self._cache[source] = checkpoint
-            logger.debug(f"Saved checkpoint for {source}: {records_processed} records")
+            self._last_flush[source] = time.monotonic()
+            self._pending.discard(source)
+            logger.debug(
+                "Saved checkpoint for %s: %d records", source, checkpoint['records_processed']
+            )
             
         except IOError as e:
-            logger.error(f"Failed to save checkpoint for {source}: {e}")
+            logger.error("Failed to save checkpoint for %s: %s", source, e)
             raise
     
+    def flush(self, source: Optional[str] = None) -> None:
+        """
+        Write checkpoints whose latest save has not reached disk yet.
+        
+        Args:
+            source: Source name, or None to flush every source
+        """
+        sources = [source] if source is not None else list(self._pending)
+        
+        for name in sources:
+            if name in self._pending:
+                self._write_checkpoint(name)
+    
     def clear_checkpoint(self, source: str) -> None:
         """
         Clear the checkpoint for a source.
@@ -115,8 +151,10 @@ class CheckpointManager:
             
         if source in self._cache:
             del self._cache[source]
+        self._pending.discard(source)
+        self._last_flush.pop(source, None)
             
-        logger.info(f"Cleared checkpoint for {source}")
+        logger.info("Cleared checkpoint for %s", source)
     
     def get_progress(self, source: str) -> tuple[int, Optional[str]]:
         """
@@ -145,14 +183,13 @@ class CheckpointManager:
         
         for checkpoint_file in self.checkpoint_dir.glob('*_checkpoint.json'):
             try:
-                with open(checkpoint_file, 'r') as f:
-                    checkpoint = json.load(f)
-                    checkpoints.append({
-                        'source': checkpoint['source'],
-                        'records_processed': checkpoint['records_processed'],
-                        'last_updated': checkpoint['last_updated']
-                    })
-            except (json.JSONDecodeError, IOError):
+                checkpoint = orjson.loads(checkpoint_file.read_bytes())
+                checkpoints.append({
+                    'source': checkpoint['source'],
+                    'records_processed': checkpoint['records_processed'],
+                    'last_updated': checkpoint['last_updated']
+                })
+            except (orjson.JSONDecodeError, IOError):
                 continue
                 
         return checkpoints
@@ -10,7 +10,8 @@ Provides:
 import asyncio
 import logging
 import time
-from typing import Any, Callable, Optional, TypeVar
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
 
 from tenacity import (
     retry,
@@ -50,37 +51,52 @@ class RateLimiter:
         self.total_requests = 0
         self.total_wait_time = 0.0
     
+    def _replenish(self) -> None:
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst_size,
+            self.tokens + (now - self.last_update) * self.requests_per_second
+        )
+        self.last_update = now
+    
     async def acquire(self) -> float:
         """
         Acquire a token, waiting if necessary.
         
+        When a token is available and no caller is already waiting, it is
+        taken without touching the lock; the event loop is single-threaded,
+        so the check and decrement cannot interleave with another task.
+        Waiters queue on the lock so they are served in order.
+        
         Returns:
             Time waited in seconds
         """
+        if not self._lock.locked():
+            self._replenish()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.total_requests += 1
+                return 0.0
+        
         async with self._lock:
-            now = time.monotonic()
-            
-            # Replenish tokens
-            time_passed = now - self.last_update
-            self.tokens = min(
-                self.burst_size,
-                self.tokens + time_passed * self.requests_per_second
-            )
-            self.last_update = now
+            self._replenish()
             
             # Wait if no tokens available
             wait_time = 0.0
             if self.tokens < 1:
                 wait_time = (1 - self.tokens) / self.requests_per_second
                 await asyncio.sleep(wait_time)
+                # The token accrued while sleeping is spent on this request
                 self.tokens = 0
+                self.last_update = time.monotonic()
             else:
                 self.tokens -= 1
-            
-            self.total_requests += 1
-            self.total_wait_time += wait_time
-            
-            return wait_time
+        
+        self.total_requests += 1
+        self.total_wait_time += wait_time
+        
+        return wait_time
     
     def get_stats(self) -> dict[str, Any]:
         """Get rate limiter statistics."""
@@ -102,7 +118,8 @@ class RetryableHTTPClient:
         rate_limiter: RateLimiter,
         retry_attempts: int = 3,
         retry_backoff_factor: float = 2.0,
-        timeout: float = 30.0
+        timeout: float = 30.0,
+        http2: bool = False
     ):
         """
         Initialize the HTTP client.
@@ -112,11 +129,13 @@ class RetryableHTTPClient:
             retry_attempts: Maximum retry attempts
             retry_backoff_factor: Exponential backoff factor
             timeout: Request timeout in seconds
+            http2: Multiplex requests over HTTP/2 (host must support it)
         """
         self.rate_limiter = rate_limiter
         self.retry_attempts = retry_attempts
         self.retry_backoff_factor = retry_backoff_factor
         self.timeout = timeout
+        self.http2 = http2
         
         self._client: Optional[httpx.AsyncClient] = None
         
@@ -126,7 +145,11 @@ class RetryableHTTPClient:
     
     async def __aenter__(self) -> 'RetryableHTTPClient':
         """Async context manager entry."""
-        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            timeout=httpx.Timeout(self.timeout, connect=10.0)
+        )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -134,41 +157,45 @@ class RetryableHTTPClient:
         if self._client:
             await self._client.aclose()
     
-    async def get(
+    async def _send(
         self,
+        method: str,
         url: str,
         params: Optional[dict[str, Any]] = None,
-        headers: Optional[dict[str, str]] = None
+        headers: Optional[dict[str, str]] = None,
+        stream: bool = False,
+        data: Optional[dict[str, Any]] = None
     ) -> httpx.Response:
         """
-        Make a GET request with rate limiting and retries.
+        Send a request with rate limiting and retries.
         
-        Args:
-            url: Request URL
-            params: Query parameters
-            headers: Request headers
-            
-        Returns:
-            HTTP response
+        With ``stream=True`` the body is not read; retries only cover getting
+        a successful status, and the caller must close the response.
         """
         await self.rate_limiter.acquire()
         
         for attempt in range(self.retry_attempts):
             try:
-                response = await self._client.get(
+                request = self._client.build_request(
+                    method,
                     url,
                     params=params,
-                    headers=headers
+                    headers=headers,
+                    data=data
                 )
+                response = await self._client.send(request, stream=stream)
                 
                 # Handle rate limit responses
                 if response.status_code == 429:
+                    await response.aclose()
                     retry_after = int(response.headers.get('Retry-After', 60))
-                    logger.warning(f"Rate limited, waiting {retry_after}s")
+                    logger.warning("Rate limited, waiting %ss", retry_after)
                     await asyncio.sleep(retry_after)
                     self.total_retries += 1
                     continue
                 
+                if response.is_error:
+                    await response.aclose()
                 response.raise_for_status()
                 return response
                 
@@ -176,8 +203,8 @@ class RetryableHTTPClient:
                 if e.response.status_code in (500, 502, 503, 504):
                     wait_time = self.retry_backoff_factor ** attempt
                     logger.warning(
-                        f"Server error {e.response.status_code}, "
-                        f"retrying in {wait_time}s (attempt {attempt + 1})"
+                        "Server error %d, retrying in %ss (attempt %d)",
+                        e.response.status_code, wait_time, attempt + 1
                     )
                     await asyncio.sleep(wait_time)
                     self.total_retries += 1
@@ -188,8 +215,8 @@ class RetryableHTTPClient:
                 if attempt < self.retry_attempts - 1:
                     wait_time = self.retry_backoff_factor ** attempt
                     logger.warning(
-                        f"Request error: {e}, "
-                        f"retrying in {wait_time}s (attempt {attempt + 1})"
+                        "Request error: %s, retrying in %ss (attempt %d)",
+                        e, wait_time, attempt + 1
                     )
                     await asyncio.sleep(wait_time)
                     self.total_retries += 1
@@ -199,6 +226,77 @@ class RetryableHTTPClient:
         self.total_errors += 1
         raise Exception(f"Failed after {self.retry_attempts} attempts: {url}")
     
+    async def get(
+        self,
+        url: str,
+        params: Optional[dict[str, Any]] = None,
+        headers: Optional[dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        Make a GET request with rate limiting and retries.
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            headers: Request headers
+            
+        Returns:
+            HTTP response
+        """
+        return await self._send('GET', url, params=params, headers=headers)
+    
+    async def post(
+        self,
+        url: str,
+        data: Optional[dict[str, Any]] = None,
+        headers: Optional[dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        Make a form-encoded POST request with rate limiting and retries.
+        
+        Args:
+            url: Request URL
+            data: Form fields sent in the request body
+            headers: Request headers
+            
+        Returns:
+            HTTP response
+        """
+        return await self._send('POST', url, headers=headers, data=data)
+    
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        params: Optional[dict[str, Any]] = None,
+        headers: Optional[dict[str, str]] = None,
+        data: Optional[dict[str, Any]] = None
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Make a streaming request with rate limiting and retries.
+        
+        Retries apply until a successful status is received; errors while
+        reading the body are raised to the caller.
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            params: Query parameters
+            headers: Request headers
+            data: Form fields sent in the request body
+            
+        Yields:
+            HTTP response with an unread body
+        """
+        response = await self._send(
+            method, url, params=params, headers=headers, stream=True, data=data
+        )
+        try:
+            yield response
+        finally:
+            await response.aclose()
+    
     def get_stats(self) -> dict[str, Any]:
         """Get client statistics."""
         return {
@@ -230,7 +328,7 @@ def create_sync_retry_decorator(
             TimeoutError,
         )),
         before_sleep=lambda retry_state: logger.warning(
-            f"Retrying after error: {retry_state.outcome.exception()}"
+            "Retrying after error: %s", retry_state.outcome.exception()
         )
     )
 
@@ -5,34 +5,114 @@ Handles writing data to the raw zone with:
 - NDJSON format for streaming processing
 - Partitioning by source and date
 - Atomic writes for data integrity
+- Background writes that keep the event loop free
 """
 
+import asyncio
 import gzip
-import json
+import io
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterator, Optional
+from typing import Any, Callable, Iterator, Optional
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Stream writes: OS-level file buffer, and the buffer in front of the gzip
+# compressor so deflate sees large chunks instead of one call per write
+FILE_BUFFER_SIZE = 1024 * 1024
+GZIP_BUFFER_SIZE = 256 * 1024
+GZIP_COMPRESSLEVEL = 6
+
+# Reads pull decompressed data in large chunks before splitting lines
+READ_BUFFER_SIZE = 128 * 1024
+
+# Smallest slice worth compressing on its own thread
+MIN_COMPRESS_SHARD_SIZE = 256 * 1024
+
+
+def _metadata_tail(source: str, batch_id: str) -> bytes:
+    """
+    Pre-encode the metadata fields shared by every record in a batch.
+    
+    Args:
+        source: Source name
+        batch_id: Unique batch identifier
+        
+    Returns:
+        Closing bytes of an NDJSON line, starting with the field separator
+    """
+    meta = {
+        '_ingested_at': datetime.utcnow().isoformat(),
+        '_source': source,
+        '_batch_id': batch_id
+    }
+    return b',' + orjson.dumps(meta)[1:] + b'\n'
+
+
+def _encode_record(record: dict[str, Any], tail: bytes) -> bytes:
+    """
+    Encode a record as an NDJSON line with the batch metadata spliced in.
+    
+    Args:
+        record: Record to encode (not modified)
+        tail: Output of _metadata_tail() for the batch
+        
+    Returns:
+        Encoded line
+    """
+    if not record:
+        return b'{' + tail[1:]
+    return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS)[:-1] + tail
+
 
 class StorageManager:
     """Manages storage of raw ingested data."""
     
-    def __init__(self, base_path: str, compress: bool = True):
+    def __init__(
+        self,
+        base_path: str,
+        compress: bool = True,
+        concurrency: int = 1
+    ):
         """
         Initialize the storage manager.
         
         Args:
             base_path: Base directory for raw data storage
             compress: Whether to gzip compress output files
+            concurrency: Threads used to compress large batches
         """
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
         self.compress = compress
+        self.concurrency = max(1, concurrency)
         self._file_handles: dict[str, Any] = {}
         self._record_counts: dict[str, int] = {}
+        
+        # Partition directories already created, keyed by (source, date)
+        self._partition_cache: dict[tuple[str, str], Path] = {}
+        self._partition_lock = threading.Lock()
+        
+        # zlib releases the GIL while deflating, so shards compress in parallel
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if compress and self.concurrency > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.concurrency,
+                thread_name_prefix='storage-compress'
+            )
+    
+    def close(self) -> None:
+        """Shut down the compression thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
     
     def _get_partition_path(
         self,
@@ -51,9 +131,14 @@ class StorageManager:
         """
         if ingest_date is None:
             ingest_date = datetime.utcnow()
-            
-        partition = self.base_path / source / f"ingest_date={ingest_date.strftime('%Y-%m-%d')}"
-        partition.mkdir(parents=True, exist_ok=True)
+        
+        date_str = ingest_date.strftime('%Y-%m-%d')
+        partition = self._partition_cache.get((source, date_str))
+        if partition is None:
+            partition = self.base_path / source / f"ingest_date={date_str}"
+            partition.mkdir(parents=True, exist_ok=True)
+            with self._partition_lock:
+                self._partition_cache[(source, date_str)] = partition
         return partition
     
     def _get_file_path(
@@ -77,6 +162,50 @@ class StorageManager:
         extension = '.ndjson.gz' if self.compress else '.ndjson'
         return partition / f"{batch_id}{extension}"
     
+    def _compress(self, payload: bytearray) -> bytes:
+        """
+        Gzip a batch payload, splitting large payloads across threads.
+        
+        Each shard becomes its own gzip member; concatenated members form a
+        valid gzip file that decompresses to the original payload, so the
+        batch still lands in a single file with one atomic rename.
+        
+        Args:
+            payload: Encoded NDJSON batch
+            
+        Returns:
+            Compressed bytes
+        """
+        shards = min(self.concurrency, len(payload) // MIN_COMPRESS_SHARD_SIZE)
+        if self._executor is None or shards < 2:
+            return gzip.compress(payload, compresslevel=GZIP_COMPRESSLEVEL)
+        
+        shard_size = -(-len(payload) // shards)
+        view = memoryview(payload)
+        parts = self._executor.map(
+            lambda start: gzip.compress(
+                view[start:start + shard_size],
+                compresslevel=GZIP_COMPRESSLEVEL
+            ),
+            range(0, len(payload), shard_size)
+        )
+        return b''.join(parts)
+    
+    @staticmethod
+    def _write_all(fd: int, data: bytes | bytearray) -> None:
+        """
+        Write a whole payload to a file descriptor.
+        
+        Args:
+            fd: Open file descriptor
+            data: Encoded bytes to write
+        """
+        # Regular files take the payload in one write(); the loop only
+        # finishes the rare short write
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    
     def write_records(
         self,
         source: str,
@@ -103,22 +232,25 @@ class StorageManager:
         temp_path = file_path.with_suffix('.tmp')
         
         try:
-            # Write to temp file first
-            open_func = gzip.open if self.compress else open
-            mode = 'wt' if self.compress else 'w'
+            # Encode the whole batch into one buffer, grown in place, so it
+            # reaches the kernel in a single write; all records share one
+            # ingest timestamp
+            tail = _metadata_tail(source, batch_id)
+            payload = bytearray()
+            for record in records:
+                payload += _encode_record(record, tail)
+            if self.compress:
+                payload = self._compress(payload)
             
-            with open_func(temp_path, mode, encoding='utf-8') as f:
-                for record in records:
-                    # Add metadata
-                    record['_ingested_at'] = datetime.utcnow().isoformat()
-                    record['_source'] = source
-                    record['_batch_id'] = batch_id
-                    
-                    json.dump(record, f, ensure_ascii=False)
-                    f.write('\n')
+            # Write to temp file first
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                self._write_all(fd, payload)
+            finally:
+                os.close(fd)
             
             # Atomic rename
-            temp_path.rename(file_path)
+            os.replace(temp_path, file_path)
             
             logger.debug(f"Wrote {len(records)} records to {file_path}")
             return len(records)
@@ -145,7 +277,7 @@ class StorageManager:
             records: Iterator of records
             batch_id: Unique batch identifier
             ingest_date: Date for partitioning
-            flush_interval: Flush to disk every N records
+            flush_interval: Write buffered records to the file every N records
             
         Returns:
             Number of records written
@@ -154,24 +286,36 @@ class StorageManager:
         temp_path = file_path.with_suffix('.tmp')
         
         count = 0
-        open_func = gzip.open if self.compress else open
-        mode = 'wt' if self.compress else 'w'
+        buffer = bytearray()
+        tail = _metadata_tail(source, batch_id)
         
         try:
-            with open_func(temp_path, mode, encoding='utf-8') as f:
+            # Layers are closed in reverse order, flushing the gzip trailer
+            # before the underlying file
+            with ExitStack() as stack:
+                f = stack.enter_context(
+                    open(temp_path, 'wb', buffering=FILE_BUFFER_SIZE)
+                )
+                if self.compress:
+                    gz = stack.enter_context(gzip.GzipFile(
+                        fileobj=f, mode='wb', compresslevel=GZIP_COMPRESSLEVEL
+                    ))
+                    f = stack.enter_context(
+                        io.BufferedWriter(gz, buffer_size=GZIP_BUFFER_SIZE)
+                    )
+                
                 for record in records:
-                    record['_ingested_at'] = datetime.utcnow().isoformat()
-                    record['_source'] = source
-                    record['_batch_id'] = batch_id
-                    
-                    json.dump(record, f, ensure_ascii=False)
-                    f.write('\n')
+                    buffer += _encode_record(record, tail)
                     count += 1
                     
                     if count % flush_interval == 0:
-                        f.flush()
+                        f.write(buffer)
+                        buffer.clear()
+                
+                if buffer:
+                    f.write(buffer)
             
-            temp_path.rename(file_path)
+            os.replace(temp_path, file_path)
             logger.info(f"Wrote {count} records to {file_path}")
             return count
             
@@ -198,10 +342,33 @@ class StorageManager:
         """
         if ingest_date:
             partition = self._get_partition_path(source, ingest_date)
-            return list(partition.glob('*.ndjson*'))
+            entries = self._scan_files(str(partition), recursive=False)
         else:
-            source_path = self.base_path / source
-            return list(source_path.glob('**/*.ndjson*'))
+            entries = self._scan_files(str(self.base_path / source))
+        return [Path(entry.path) for entry in entries]
+    
+    @classmethod
+    def _scan_files(cls, directory: str, recursive: bool = True) -> Iterator[os.DirEntry]:
+        """
+        Walk a directory for data files with os.scandir.
+        
+        Args:
+            directory: Directory to scan
+            recursive: Whether to descend into subdirectories
+            
+        Yields:
+            Directory entries for NDJSON files
+        """
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            yield from cls._scan_files(entry.path)
+                    elif '.ndjson' in entry.name:
+                        yield entry
+        except FileNotFoundError:
+            return
     
     def read_records(
         self,
@@ -216,13 +383,18 @@ class StorageManager:
         Yields:
             Records from the file
         """
-        open_func = gzip.open if file_path.suffix == '.gz' else open
-        mode = 'rt' if file_path.suffix == '.gz' else 'r'
+        if file_path.suffix == '.gz':
+            f = io.BufferedReader(
+                gzip.open(file_path, 'rb'), buffer_size=READ_BUFFER_SIZE
+            )
+        else:
+            f = open(file_path, 'rb', buffering=READ_BUFFER_SIZE)
         
-        with open_func(file_path, mode, encoding='utf-8') as f:
+        # Binary lines go straight to orjson, skipping text decoding
+        with f:
             for line in f:
-                if line.strip():
-                    yield json.loads(line)
+                if not line.isspace():
+                    yield orjson.loads(line)
     
     def get_stats(self, source: str) -> dict[str, Any]:
         """
@@ -234,14 +406,115 @@ class StorageManager:
         Returns:
             Statistics dictionary
         """
-        files = self.list_files(source)
-        total_size = sum(f.stat().st_size for f in files)
+        # One pass over DirEntry objects; no Path objects or extra stat calls
+        file_count = 0
+        total_size = 0
+        partitions = set()
+        for entry in self._scan_files(str(self.base_path / source)):
+            file_count += 1
+            total_size += entry.stat().st_size
+            partitions.add(os.path.dirname(entry.path))
         
         return {
             'source': source,
-            'file_count': len(files),
+            'file_count': file_count,
             'total_size_bytes': total_size,
             'total_size_mb': round(total_size / (1024 * 1024), 2),
-            'partitions': len(set(f.parent for f in files))
+            'partitions': len(partitions)
         }
 
+
+class BackgroundWriter:
+    """
+    Writes record batches on a worker thread, off the event loop.
+    
+    Batches are written in submission order by a single consumer task, and
+    each batch's ``on_written`` callback (typically a checkpoint save) runs
+    only after that batch is on disk. The queue is bounded so producers are
+    throttled when writes fall behind. After a failed write, later batches
+    and callbacks are dropped so checkpoints never move past missing data.
+    """
+    
+    def __init__(self, storage_manager: StorageManager, max_pending: int = 4):
+        """
+        Initialize the background writer.
+        
+        Args:
+            storage_manager: Storage manager that performs the writes
+            max_pending: Maximum batches queued before submit() blocks
+        """
+        self.storage_mgr = storage_manager
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[Exception] = None
+        self._error_raised = False
+    
+    async def __aenter__(self) -> 'BackgroundWriter':
+        """Start the consumer task."""
+        self._task = asyncio.create_task(self._run())
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Drain pending batches and stop the consumer task."""
+        await self._queue.put(None)
+        await self._task
+        if self._error is not None and not self._error_raised and exc_type is None:
+            self._error_raised = True
+            raise self._error
+    
+    async def _run(self) -> None:
+        """Consume queued batches until the stop sentinel arrives."""
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            
+            batch, on_written = item
+            if self._error is not None:
+                continue
+            
+            try:
+                if batch is not None:
+                    await asyncio.to_thread(self.storage_mgr.write_records, *batch)
+                if on_written is not None:
+                    on_written()
+            except Exception as e:
+                logger.error(f"Background write failed: {e}")
+                self._error = e
+    
+    def _raise_if_failed(self) -> None:
+        """Surface a failed background write to the producer."""
+        if self._error is not None:
+            self._error_raised = True
+            raise self._error
+        if self._task is None or self._task.done():
+            raise RuntimeError("Background writer is not running")
+    
+    async def submit(
+        self,
+        source: str,
+        records: list[dict[str, Any]],
+        batch_id: str,
+        on_written: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Queue a batch for writing.
+        
+        Args:
+            source: Source name
+            records: Records to write
+            batch_id: Unique batch identifier
+            on_written: Called once the batch has been written
+        """
+        self._raise_if_failed()
+        await self._queue.put(((source, records, batch_id), on_written))
+    
+    async def after_pending(self, callback: Callable[[], None]) -> None:
+        """
+        Queue a callback to run once all batches submitted so far are written.
+        
+        Args:
+            callback: Function to call
+        """
+        self._raise_if_failed()
+        await self._queue.put((None, callback))
@@ -11,17 +11,19 @@ This job runs:
 from __future__ import annotations
 import argparse
 import logging
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
 
 import yaml
+from pyspark import StorageLevel
 from pyspark.sql import SparkSession, DataFrame
 from pyspark.sql import functions as F
-from pyspark.sql.window import Window
 from pyspark.ml.feature import (
-    Tokenizer, StopWordsRemover, CountVectorizer, IDF, NGram, RegexTokenizer
+    StopWordsRemover, CountVectorizer, HashingTF, IDF, NGram, RegexTokenizer,
+    SQLTransformer
 )
 from pyspark.ml.clustering import LDA
-from pyspark.ml import Pipeline
+from pyspark.ml.functions import vector_to_array
+from pyspark.ml import Pipeline, PipelineModel
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -104,13 +106,86 @@ def create_spark_session(config: Dict[str, Any]) -> SparkSession:
     builder = builder.config('spark.executor.memory', spark_config.get('executor_memory', '2g'))
     builder = builder.config('spark.sql.shuffle.partitions', spark_config.get('shuffle_partitions', 200))
     
-    return builder.getOrCreate()
+    # GraphFrames' label propagation and the LDA optimizers run on RDDs of
+    # JVM objects, whose shuffles are much smaller with Kryo than with Java
+    # serialization
+    builder = builder.config('spark.serializer', 'org.apache.spark.serializer.KryoSerializer')
+    builder = builder.config('spark.kryo.registrationRequired', 'false')
+    
+    # Vertex id lists up to this size are broadcast to filter citation
+    # edges map-side instead of shuffling the edge list
+    broadcast_threshold = spark_config.get('broadcast_join_threshold')
+    if broadcast_threshold:
+        builder = builder.config('spark.sql.autoBroadcastJoinThreshold', broadcast_threshold)
+    
+    # Let AQE coalesce the small post-shuffle partitions of the trend and
+    # aggregation stages (same switch as the ETL job)
+    if spark_config.get('adaptive_query_execution', True):
+        builder = builder.config('spark.sql.adaptive.enabled', 'true')
+    
+    # Outputs are small tables read repeatedly by the API; zstd roughly
+    # halves them versus snappy at similar decode speed
+    builder = builder.config(
+        'spark.sql.parquet.compression.codec',
+        spark_config.get('analytics_compression', 'zstd')
+    )
+    builder = builder.config('spark.sql.parquet.enableVectorizedReader', 'true')
+    builder = builder.config('spark.sql.parquet.columnarReaderBatchSize', 8192)
+    
+    # PageRank and label propagation run as GraphX Pregel loops whose
+    # lineage grows with every iteration; checkpointing every few
+    # iterations keeps it (and the planning cost) bounded
+    checkpoint_dir = spark_config.get('checkpoint_dir')
+    if checkpoint_dir:
+        builder = builder.config(
+            'spark.graphx.pregel.checkpointInterval',
+            spark_config.get('pregel_checkpoint_interval', 5)
+        )
+    
+    spark = builder.getOrCreate()
+    if checkpoint_dir:
+        spark.sparkContext.setCheckpointDir(checkpoint_dir)
+    
+    return spark
 
 
 # =============================================================================
 # TOPIC MODELING
 # =============================================================================
 
+def _hashed_vocabulary(
+    docs: DataFrame,
+    text_model: PipelineModel,
+    terms_col: str,
+    hashing_tf: HashingTF,
+    vocab_size: int,
+    sample_fraction: float
+) -> List[Tuple[int, str]]:
+    """
+    Recover display terms for HashingTF feature indices.
+    
+    A CountVectorizer is fitted on a sample of the corpus only to find
+    frequent terms; each hash bucket is labelled with the most frequent
+    sampled term that hashes into it.
+    
+    Returns:
+        (term_index, term) pairs for the buckets that received a term
+    """
+    sample = text_model.transform(docs.sample(fraction=sample_fraction, seed=42))
+    sample_cv = CountVectorizer(
+        inputCol=terms_col, outputCol="sample_tf", vocabSize=vocab_size
+    ).fit(sample)
+    
+    # The fitted vocabulary is ordered by frequency, so the first term seen
+    # for a bucket is its most frequent one
+    bucket_terms: Dict[int, str] = {}
+    for term in sample_cv.vocabulary:
+        bucket_terms.setdefault(hashing_tf.indexOf(term), term)
+    
+    logger.info(f"Labelled {len(bucket_terms)} of {vocab_size} hashed features")
+    return list(bucket_terms.items())
+
+
 def run_topic_modeling(
     spark: SparkSession,
     works_df: DataFrame,
@@ -137,22 +212,31 @@ def run_topic_modeling(
     vocab_size = topic_config.get('vocabulary_size', 10000)
     min_doc_freq = topic_config.get('min_doc_freq', 10)
     max_doc_freq_ratio = topic_config.get('max_doc_freq_ratio', 0.6)
+    optimizer = topic_config.get('optimizer', 'online')
     
-    # Filter works with abstracts
-    docs = works_df.filter(
+    # Filter works with abstracts. Cached because the vocabulary and IDF
+    # fits and the transform each pass over the documents.
+    docs = works_df.select("work_id", "abstract", "year").filter(
         (F.col("abstract").isNotNull()) & 
         (F.length(F.col("abstract")) > 100)
-    ).select("work_id", "abstract", "year")
+    ).persist(StorageLevel.MEMORY_AND_DISK)
     
     doc_count = docs.count()
     logger.info(f"Documents with abstracts: {doc_count}")
     
+    # With no documents there is nothing to fit; returning no topics also
+    # makes trend analysis skip instead of running its joins on empty input
+    if doc_count == 0:
+        logger.warning("No documents with abstracts, skipping topic modeling")
+        docs.unpersist()
+        return None, None, None
+    
     if doc_count < num_topics * 10:
         logger.warning(f"Too few documents ({doc_count}) for {num_topics} topics")
         num_topics = max(5, doc_count // 20)
         logger.info(f"Reduced to {num_topics} topics")
     
-    # Text preprocessing pipeline with bigrams
+    # Text preprocessing pipeline
     # Use RegexTokenizer to handle punctuation better
     tokenizer = RegexTokenizer(
         inputCol="abstract", 
@@ -161,102 +245,135 @@ def run_topic_modeling(
         minTokenLength=3  # Ignore short tokens
     )
     
-    # Remove stopwords
-    remover = StopWordsRemover(inputCol="words", outputCol="filtered_words")
-    
-    # Generate bigrams for phrase detection
-    bigram = NGram(n=2, inputCol="filtered_words", outputCol="bigrams")
-    
-    # Count vectorizer for unigrams
-    cv_unigram = CountVectorizer(
-        inputCol="filtered_words",
-        outputCol="tf_unigram",
-        vocabSize=vocab_size // 2,
-        minDF=min_doc_freq,
-        maxDF=max_doc_freq_ratio
-    )
-    
-    # Count vectorizer for bigrams  
-    cv_bigram = CountVectorizer(
-        inputCol="bigrams",
-        outputCol="tf_bigram",
-        vocabSize=vocab_size // 2,
-        minDF=max(3, min_doc_freq // 2),  # Bigrams need fewer occurrences
-        maxDF=max_doc_freq_ratio
-    )
-    
-    # We'll use unigrams for simplicity (bigrams add complexity)
-    # but filter better with expanded stopwords
-    cv = CountVectorizer(
-        inputCol="filtered_words",
-        outputCol="tf",
-        vocabSize=vocab_size,
-        minDF=min_doc_freq,
-        maxDF=max_doc_freq_ratio
+    # Remove English stopwords and scientific filler words before
+    # vectorizing, so filler never takes vocabulary slots or LDA work
+    remover = StopWordsRemover(
+        inputCol="words",
+        outputCol="filtered_words",
+        stopWords=sorted(
+            set(StopWordsRemover.loadDefaultStopWords("english")) | SCIENTIFIC_STOPWORDS
+        )
     )
     
-    # IDF
-    idf = IDF(inputCol="tf", outputCol="features")
+    # Optionally add bigrams for phrase detection. Unigrams and bigrams
+    # share one vocabulary, so the corpus is still counted in a single pass.
+    text_stages = [tokenizer, remover]
+    terms_col = "filtered_words"
+    if topic_config.get('use_bigrams', False):
+        bigram = NGram(n=2, inputCol="filtered_words", outputCol="bigrams")
+        merge_terms = SQLTransformer(
+            statement="SELECT *, concat(filtered_words, bigrams) AS terms FROM __THIS__"
+        )
+        text_stages += [bigram, merge_terms]
+        terms_col = "terms"
+    
+    # Term frequencies: CountVectorizer builds a vocabulary with a global
+    # document-frequency pass; HashingTF needs no fit or driver-side
+    # vocabulary, which suits large corpora. Without maxDF, hashed features
+    # lean on IDF (with minDocFreq) to down-weight common terms.
+    vectorizer = topic_config.get('vectorizer', 'count')
+    if vectorizer == "hashing":
+        tf_stage = HashingTF(inputCol=terms_col, outputCol="tf", numFeatures=vocab_size)
+        idf = IDF(inputCol="tf", outputCol="features", minDocFreq=min_doc_freq)
+    else:
+        tf_stage = CountVectorizer(
+            inputCol=terms_col,
+            outputCol="tf",
+            vocabSize=vocab_size,
+            minDF=min_doc_freq,
+            maxDF=max_doc_freq_ratio
+        )
+        idf = IDF(inputCol="tf", outputCol="features")
     
-    # LDA
+    # LDA: online variational Bayes works on mini-batches and scales to
+    # large corpora; EM makes a full pass per iteration and suits small ones
     lda = LDA(
         k=num_topics,
         maxIter=max_iterations,
         featuresCol="features",
-        optimizer="em"
+        optimizer=optimizer
     )
+    if optimizer == "online":
+        lda.setSubsamplingRate(topic_config.get('subsampling_rate', 0.05))
+        lda.setLearningDecay(0.51)
+        lda.setLearningOffset(1024.0)
+    else:
+        lda.setKeepLastCheckpoint(False)
     
     # Build and run pipeline (without LDA first to get vocab)
-    preprocess_pipeline = Pipeline(stages=[tokenizer, remover, cv, idf])
+    preprocess_pipeline = Pipeline(stages=text_stages + [tf_stage, idf])
     preprocess_model = preprocess_pipeline.fit(docs)
-    transformed = preprocess_model.transform(docs)
     
-    # Get vocabulary
-    cv_model = preprocess_model.stages[2]
-    vocabulary = cv_model.vocabulary
+    # LDA iterates over the features many times and the document-topic
+    # assignments are computed from them again, so tokenization and TF-IDF
+    # run once. Only the columns LDA needs are cached.
+    transformed = preprocess_model.transform(docs).select(
+        "work_id", "year", "features"
+    ).persist(StorageLevel.MEMORY_AND_DISK)
+    
+    # Get vocabulary as (term_index, term) pairs
+    if vectorizer == "hashing":
+        vocab_pairs = _hashed_vocabulary(
+            docs,
+            PipelineModel(stages=preprocess_model.stages[:len(text_stages)]),
+            terms_col,
+            tf_stage,
+            vocab_size,
+            topic_config.get('vocabulary_sample_fraction', 0.05)
+        )
+    else:
+        cv_model = preprocess_model.stages[len(text_stages)]
+        vocab_pairs = list(enumerate(cv_model.vocabulary))
     
     # Run LDA
     lda_model = lda.fit(transformed)
+    docs.unpersist()
     
     # Extract topic-term distributions
     topics_matrix = lda_model.describeTopics(maxTermsPerTopic=15)
     
-    # Convert to readable format with filler word filtering
-    def get_topic_terms(term_indices, term_weights):
-        terms = []
-        for idx, weight in zip(term_indices, term_weights):
-            if idx < len(vocabulary):
-                term = vocabulary[idx].lower()
-                # Skip scientific filler words and short terms
-                if term not in SCIENTIFIC_STOPWORDS and len(term) > 3:
-                    terms.append({
-                        "term": vocabulary[idx],
-                        "weight": float(weight)
-                    })
-        # Return at least some terms even if all filtered
-        if not terms and term_indices:
-            for idx, weight in zip(term_indices[:3], term_weights[:3]):
-                if idx < len(vocabulary):
-                    terms.append({
-                        "term": vocabulary[idx],
-                        "weight": float(weight)
-                    })
-        return terms
-    
-    from pyspark.sql.types import ArrayType, StructType, StructField, StringType, FloatType
-    
-    topic_terms_schema = ArrayType(StructType([
-        StructField("term", StringType()),
-        StructField("weight", FloatType())
-    ]))
-    
-    get_terms_udf = F.udf(get_topic_terms, topic_terms_schema)
-    
-    topics_df = topics_matrix.select(
+    # Resolve term indices against the vocabulary with a broadcast join
+    # instead of a Python UDF closing over the whole vocabulary
+    vocab_df = spark.createDataFrame(vocab_pairs, ["term_index", "term"])
+    
+    ranked_terms = topics_matrix.select(
         F.col("topic").alias("topic_id"),
-        get_terms_udf(F.col("termIndices"), F.col("termWeights")).alias("top_terms")
+        F.posexplode(F.arrays_zip("termIndices", "termWeights")).alias("rank", "tw")
+    ).join(
+        # Left join: a hashed bucket may have no display term (the label
+        # then falls back to "Unknown Topic") but the topic is kept
+        F.broadcast(vocab_df),
+        F.col("tw.termIndices") == F.col("term_index"),
+        "left"
+    ).groupBy("topic_id").agg(
+        # Sorting on rank restores describeTopics order after the shuffle
+        F.sort_array(F.collect_list(F.struct(
+            F.col("rank"),
+            F.col("term"),
+            F.col("tw.termWeights").cast("float").alias("weight")
+        ))).alias("ranked")
+    ).select(
+        "topic_id",
+        F.transform(
+            "ranked", lambda t: F.struct(t["term"].alias("term"), t["weight"].alias("weight"))
+        ).alias("all_terms")
+    )
+    
+    # Skip scientific filler words and short terms, but return at least some
+    # terms even if all are filtered
+    stopwords = F.array(*[F.lit(w) for w in sorted(SCIENTIFIC_STOPWORDS)])
+    kept_terms = F.filter(
+        "all_terms",
+        lambda t: ~F.array_contains(stopwords, F.lower(t["term"])) & (F.length(t["term"]) > 3)
+    )
+    
+    topics_df = ranked_terms.select(
+        "topic_id",
+        F.when(F.size(kept_terms) > 0, kept_terms)
+            .otherwise(F.slice("all_terms", 1, 3))
+            .alias("top_terms")
     ).withColumn(
-        # Use first term as label (already filtered by get_topic_terms)
+        # Use first term as label (already filtered above)
         # Single term is cleaner for display
         "label",
         F.coalesce(
@@ -268,38 +385,26 @@ def run_topic_modeling(
     # Get document-topic distributions
     doc_topics = lda_model.transform(transformed)
     
-    # Extract topic assignments (dominant topic and score)
-    from pyspark.sql.types import IntegerType, DoubleType
-    
-    def get_dominant_topic(topic_dist):
-        if topic_dist is None:
-            return None
-        max_idx = 0
-        max_val = float(topic_dist[0])
-        for i, val in enumerate(topic_dist):
-            if float(val) > max_val:
-                max_val = float(val)
-                max_idx = i
-        return max_idx
-    
-    def get_topic_score(topic_dist, topic_idx):
-        if topic_dist is None or topic_idx is None:
-            return None
-        return float(topic_dist[topic_idx])
-    
-    get_dominant_udf = F.udf(get_dominant_topic, IntegerType())
-    get_score_udf = F.udf(get_topic_score, DoubleType())
-    
+    # Extract topic assignments (dominant topic and its probability) with
+    # SQL array functions so the work stays in the JVM
     work_topics_df = doc_topics.select(
         F.col("work_id"),
         F.col("year"),
-        get_dominant_udf(F.col("topicDistribution")).alias("topic_id")
-    ).withColumn(
-        "topic_score",
-        F.lit(1.0)  # Simplified; in production, extract from distribution
-    )
-    
-    logger.info(f"Created {topics_df.count()} topics")
+        vector_to_array(F.col("topicDistribution")).alias("topic_dist")
+    ).selectExpr(
+        "work_id",
+        "year",
+        "CAST(array_position(topic_dist, array_max(topic_dist)) - 1 AS INT) AS topic_id",
+        "array_max(topic_dist) AS topic_score"
+    ).persist(StorageLevel.MEMORY_AND_DISK)
+    
+    # The assignments are reused by the writes and trend analysis; compute
+    # them now so the much larger feature vectors can be released
+    work_topics_df.count()
+    transformed.unpersist()
+    
+    # describeTopics returns one row per topic, so no job is needed to count
+    logger.info(f"Created {num_topics} topics")
     
     return topics_df, work_topics_df, None
 
@@ -348,15 +453,31 @@ def run_graph_analytics(
         F.col("cited_work_id").alias("dst")
     )
     
-    # Filter to valid vertices only
+    # Filter to valid vertices only. Semi joins keep just the edge columns
+    # and never duplicate edges; Spark broadcasts the id list on its own
+    # when it is under the broadcast threshold.
     valid_ids = vertices.select("id")
-    edges = edges.join(valid_ids, edges.src == valid_ids.id, "inner").drop("id")
-    edges = edges.join(valid_ids, edges.dst == valid_ids.id, "inner").drop("id")
+    edges = edges.join(
+        valid_ids.withColumnRenamed("id", "src"), "src", "leftsemi"
+    ).join(
+        valid_ids.withColumnRenamed("id", "dst"), "dst", "leftsemi"
+    ).select("src", "dst")
     
-    logger.info(f"Graph: {vertices.count()} vertices, {edges.count()} edges")
+    # PageRank, label propagation and the in-degree count each rebuild the
+    # graph from these frames; cache them until the metrics are computed.
+    # Edges are cached hash-partitioned by dst, so the in-degree
+    # aggregation below reuses that partitioning instead of shuffling.
+    vertices = vertices.persist(StorageLevel.MEMORY_AND_DISK)
+    edges = edges.repartition("dst").persist(StorageLevel.MEMORY_AND_DISK)
     
-    if edges.count() == 0:
+    # Sizes are logged only at DEBUG; each count is a full Spark job
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Graph: {vertices.count()} vertices, {edges.count()} edges")
+    
+    if edges.isEmpty():
         logger.warning("No citation edges found, skipping graph analytics")
+        edges.unpersist()
+        vertices.unpersist()
         # Return basic metrics
         return works_df.select("work_id").withColumn(
             "pagerank", F.lit(1.0)
@@ -374,8 +495,16 @@ def run_graph_analytics(
     max_iter = pagerank_config.get('max_iterations', 20)
     reset_prob = pagerank_config.get('reset_probability', 0.15)
     
-    logger.info(f"Running PageRank (max_iter={max_iter}, reset_prob={reset_prob})...")
-    pagerank_results = graph.pageRank(resetProbability=reset_prob, maxIter=max_iter)
+    tolerance = pagerank_config.get('tolerance')
+    
+    # GraphFrames takes either a convergence tolerance or a fixed iteration
+    # count; with a tolerance, PageRank stops as soon as the ranks settle
+    if tolerance:
+        logger.info(f"Running PageRank (tol={tolerance}, reset_prob={reset_prob})...")
+        pagerank_results = graph.pageRank(resetProbability=reset_prob, tol=tolerance)
+    else:
+        logger.info(f"Running PageRank (max_iter={max_iter}, reset_prob={reset_prob})...")
+        pagerank_results = graph.pageRank(resetProbability=reset_prob, maxIter=max_iter)
     
     pagerank_df = pagerank_results.vertices.select(
         F.col("id").alias("work_id"),
@@ -394,12 +523,10 @@ def run_graph_analytics(
         F.col("label").alias("community_id")
     )
     
-    # Citation counts (in-degree)
-    citation_counts = edges.groupBy("dst").agg(
-        F.count("*").alias("citation_count")
-    ).select(
-        F.col("dst").alias("work_id"),
-        F.col("citation_count")
+    # Citation counts (in-degree, grouped on the cached dst partitioning)
+    citation_counts = graph.inDegrees.select(
+        F.col("id").alias("work_id"),
+        F.col("inDegree").alias("citation_count")
     )
     
     # Combine all metrics
@@ -407,9 +534,13 @@ def run_graph_analytics(
         community_df, "work_id", "left"
     ).join(
         citation_counts, "work_id", "left"
-    ).fillna(0, ["citation_count"])
+    ).fillna(0, ["citation_count"]).persist(StorageLevel.MEMORY_AND_DISK)
     
+    # Materialize the metrics (reused by several writes) so the graph
+    # inputs can be released
     logger.info(f"Computed metrics for {metrics_df.count()} works")
+    edges.unpersist()
+    vertices.unpersist()
     
     return metrics_df
 
@@ -483,32 +614,40 @@ def run_trend_analysis(
         F.col("paper_count") / F.col("total_papers")
     )
     
-    # Join with topic labels
+    # Join with topic labels; there is one row per topic, so broadcast it
+    # rather than shuffling the trend counts by topic_id
     topic_trends_df = topic_trends.join(
-        topics_df.select("topic_id", "label"),
+        F.broadcast(topics_df.select("topic_id", "label")),
         "topic_id"
     ).select(
         "year", "topic_id", "label", "paper_count", "total_papers", "topic_share"
-    ).orderBy("year", "topic_id")
+    ).orderBy("year", "topic_id").persist(StorageLevel.MEMORY_AND_DISK)
+    
+    # Emerging topics are only reported for the most recent year. The max
+    # is joined in as a one-row broadcast rather than collected to the
+    # driver, so it stays part of the same plan.
+    max_year_df = topic_trends_df.agg(F.max("year").alias("max_year"))
     
     # Calculate growth rates for emerging topics
-    # Use 2-year rolling windows for more stability
-    window = Window.partitionBy("topic_id").orderBy("year")
+    # Use 2-year rolling windows for more stability: look up the previous
+    # two years of each topic with equi-joins on (topic_id, year) rather
+    # than lag() over a sorted window, and only for the latest year
+    def shifted(years_back: int, share_col: str, count_col: str) -> DataFrame:
+        return topic_trends_df.select(
+            "topic_id",
+            (F.col("year") + years_back).alias("year"),
+            F.col("topic_share").alias(share_col),
+            F.col("paper_count").alias(count_col)
+        )
     
-    with_rolling = topic_trends_df.withColumn(
+    with_rolling = topic_trends_df.join(
+        F.broadcast(max_year_df), F.col("year") == F.col("max_year")
+    ).drop("max_year").join(
         # Previous year's values
-        "prev_share",
-        F.lag("topic_share", 1).over(window)
-    ).withColumn(
-        "prev_count",
-        F.lag("paper_count", 1).over(window)
-    ).withColumn(
+        shifted(1, "prev_share", "prev_count"), ["topic_id", "year"], "left"
+    ).join(
         # Two years ago (for smoothing)
-        "prev2_share",
-        F.lag("topic_share", 2).over(window)
-    ).withColumn(
-        "prev2_count",
-        F.lag("paper_count", 2).over(window)
+        shifted(2, "prev2_share", "prev2_count"), ["topic_id", "year"], "left"
     )
     
     # Calculate growth using smoothed baseline (avg of prev 1-2 years)
@@ -534,31 +673,27 @@ def run_trend_analysis(
         (F.col("topic_share") - F.col("baseline_share")) / F.col("baseline_share")
     )
     
-    # Identify emerging topics in most recent year
-    max_year = topics_with_year.agg(F.max("year")).collect()[0][0]
-    
-    # Filter out generic/filler topic labels
+    # Filter out generic/filler topic labels once for both queries below
+    # (check if first word of label is generic). Spark turns an isin over
+    # this many literals into a hash-set lookup.
     generic_labels_lower = [l.lower() for l in GENERIC_TOPIC_LABELS]
-    
-    emerging_topics_df = growth.filter(
-        (F.col("year") == max_year) & 
-        (F.col("growth_rate") > emerging_threshold) &
-        # Exclude generic labels (check if first word of label is generic)
-        (~F.lower(F.split(F.col("label"), " ")[0]).isin(generic_labels_lower))
+    candidates = growth.filter(
+        ~F.lower(F.split(F.col("label"), " ")[0]).isin(generic_labels_lower)
     ).select(
         "topic_id", "label", "paper_count", "topic_share", "growth_rate"
-    ).orderBy(F.col("growth_rate").desc())
+    )
+    
+    emerging_topics_df = candidates.filter(
+        F.col("growth_rate") > emerging_threshold
+    ).orderBy(F.col("growth_rate").desc()).persist(StorageLevel.MEMORY_AND_DISK)
     
     # If we have no emerging topics, get the top growing topics above 0%
-    if emerging_topics_df.count() == 0:
+    if emerging_topics_df.isEmpty():
         logger.warning("No emerging topics above threshold, using top positive growth")
-        emerging_topics_df = growth.filter(
-            (F.col("year") == max_year) & 
-            (F.col("growth_rate") > 0) &
-            (~F.lower(F.split(F.col("label"), " ")[0]).isin(generic_labels_lower))
-        ).select(
-            "topic_id", "label", "paper_count", "topic_share", "growth_rate"
-        ).orderBy(F.col("growth_rate").desc()).limit(10)
+        emerging_topics_df.unpersist()
+        emerging_topics_df = candidates.filter(
+            F.col("growth_rate") > 0
+        ).orderBy(F.col("growth_rate").desc()).limit(10).persist(StorageLevel.MEMORY_AND_DISK)
     
     logger.info(f"Found {emerging_topics_df.count()} emerging topics")
     
@@ -577,9 +712,15 @@ def create_aggregations(
     work_topics_df: DataFrame,
     authors_df: DataFrame,
     work_authors_df: DataFrame,
-    output_path: str
+    output_path: str,
+    works_count: int
 ) -> None:
-    """Create pre-aggregated tables for the UI/API."""
+    """
+    Create pre-aggregated tables for the UI/API.
+    
+    ``works_count`` is the row count of ``works_df`` already computed by the
+    caller, reused here instead of running another count job.
+    """
     logger.info("Creating aggregations for UI...")
     
     # Top papers by PageRank
@@ -591,6 +732,8 @@ def create_aggregations(
             "pagerank", "citation_count", "community_id"
         ).orderBy(F.col("pagerank").desc()).limit(1000)
         
+        # Small ranked outputs go to a single file, kept in rank order
+        top_papers = top_papers.coalesce(1).sortWithinPartitions(F.col("pagerank").desc())
         top_papers.write.mode("overwrite").parquet(f"{output_path}/top_papers")
         logger.info(f"Wrote top papers")
     
@@ -606,29 +749,38 @@ def create_aggregations(
             authors_df, "author_id"
         ).orderBy(F.col("total_pagerank").desc()).limit(500)
         
+        author_metrics = author_metrics.coalesce(1).sortWithinPartitions(
+            F.col("total_pagerank").desc()
+        )
         author_metrics.write.mode("overwrite").parquet(f"{output_path}/top_authors")
         logger.info(f"Wrote top authors")
     
-    # Yearly statistics
+    # Yearly statistics (field counts are HyperLogLog estimates; exact
+    # distinct counts are not needed for display)
     yearly_stats = works_df.groupBy("year").agg(
         F.count("*").alias("paper_count"),
-        F.countDistinct("primary_field").alias("field_count")
+        F.approx_count_distinct("primary_field", rsd=0.02).alias("field_count")
     ).orderBy("year")
     
-    yearly_stats.write.mode("overwrite").parquet(f"{output_path}/yearly_stats")
+    # Small result tables are written as a single file each
+    yearly_stats.coalesce(1).write.mode("overwrite").parquet(f"{output_path}/yearly_stats")
     
     # Field distribution
     field_stats = works_df.groupBy("primary_field", "year").agg(
         F.count("*").alias("paper_count")
     ).orderBy("primary_field", "year")
     
-    field_stats.write.mode("overwrite").parquet(f"{output_path}/field_stats")
+    field_stats.coalesce(1).write.mode("overwrite").parquet(f"{output_path}/field_stats")
     
-    # Overall stats
+    # Overall stats (one aggregation job for both distinct counts)
+    coverage = works_df.agg(
+        F.approx_count_distinct("year", rsd=0.02).alias("years_covered"),
+        F.approx_count_distinct("source", rsd=0.02).alias("sources")
+    ).first()
     stats = {
-        "total_works": works_df.count(),
-        "years_covered": works_df.select("year").distinct().count(),
-        "sources": works_df.select("source").distinct().count(),
+        "total_works": works_count,
+        "years_covered": coverage["years_covered"],
+        "sources": coverage["sources"],
     }
     
     if metrics_df is not None:
@@ -636,7 +788,7 @@ def create_aggregations(
         stats["total_citations"] = int(edge_count) if edge_count else 0
     
     stats_df = spark.createDataFrame([stats])
-    stats_df.write.mode("overwrite").parquet(f"{output_path}/overall_stats")
+    stats_df.coalesce(1).write.mode("overwrite").parquet(f"{output_path}/overall_stats")
     
     logger.info("Aggregations complete")
 
@@ -663,20 +815,38 @@ def main():
         
         # Read processed data
         logger.info("Loading processed data...")
-        works_df = spark.read.parquet(f"{processed_path}/works")
-        citations_df = spark.read.parquet(f"{processed_path}/citations")
+        # Works and citations feed every stage below; keep only the columns
+        # the stages use and cache them so parquet is scanned once.
+        # Abstracts, by far the widest column, are only read by topic
+        # modeling, which scans them on its own with column pruning.
+        works_df = spark.read.parquet(f"{processed_path}/works").select(
+            "work_id", "source", "title", "year", "primary_field"
+        ).persist(StorageLevel.MEMORY_AND_DISK)
+        citations_df = spark.read.parquet(f"{processed_path}/citations").select(
+            "citing_work_id", "cited_work_id"
+        ).persist(StorageLevel.MEMORY_AND_DISK)
         authors_df = spark.read.parquet(f"{processed_path}/authors")
         work_authors_df = spark.read.parquet(f"{processed_path}/work_authors")
         
-        logger.info(f"Works: {works_df.count()}")
-        logger.info(f"Citations: {citations_df.count()}")
+        works_count = works_df.count()
+        logger.info(f"Works: {works_count}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Citations: {citations_df.count()}")
         
         # Run topic modeling
-        topics_df, work_topics_df, _ = run_topic_modeling(spark, works_df, config)
+        abstracts_df = spark.read.parquet(f"{processed_path}/works").select(
+            "work_id", "abstract", "year"
+        )
+        topics_df, work_topics_df, _ = run_topic_modeling(spark, abstracts_df, config)
         
         if topics_df is not None:
-            topics_df.write.mode("overwrite").parquet(f"{processed_path}/topics")
-            work_topics_df.write.mode("overwrite").parquet(f"{processed_path}/work_topics")
+            # One row per topic fits one file; assignments are range
+            # partitioned so each file covers a narrow span of years and
+            # readers can skip files on the year min/max statistics
+            topics_df.coalesce(1).write.mode("overwrite").parquet(f"{processed_path}/topics")
+            work_topics_df.repartitionByRange("year").write.mode("overwrite").parquet(
+                f"{processed_path}/work_topics"
+            )
         
         # Run graph analytics
         metrics_df = run_graph_analytics(spark, works_df, citations_df, config)
@@ -691,17 +861,19 @@ def main():
             )
             
             if topic_trends_df is not None:
-                topic_trends_df.write.mode("overwrite").parquet(f"{analytics_path}/topic_trends")
+                topic_trends_df.coalesce(1).write.mode("overwrite").parquet(f"{analytics_path}/topic_trends")
             
             if emerging_topics_df is not None:
-                emerging_topics_df.write.mode("overwrite").parquet(f"{analytics_path}/emerging_topics")
+                emerging_topics_df.coalesce(1).write.mode("overwrite").parquet(f"{analytics_path}/emerging_topics")
         
         # Create aggregations
         create_aggregations(
             spark, works_df, metrics_df, topics_df, work_topics_df,
-            authors_df, work_authors_df, analytics_path
+            authors_df, work_authors_df, analytics_path, works_count
         )
         
+        spark.catalog.clearCache()
+        
         logger.info("=" * 60)
         logger.info("Analytics Pipeline Complete!")
         logger.info("=" * 60)
@@ -12,13 +12,14 @@ This job:
 from __future__ import annotations
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
-from pyspark.sql import SparkSession, DataFrame
+from pyspark import StorageLevel
+from pyspark.sql import Column, SparkSession, DataFrame
 from pyspark.sql import functions as F
-from pyspark.sql.window import Window
 from pyspark.sql.types import (
     StructType, StructField, StringType, IntegerType, 
     ArrayType, FloatType, BooleanType
@@ -48,13 +49,77 @@ def create_spark_session(config: Dict[str, Any]) -> SparkSession:
     shuffle_partitions = spark_config.get('shuffle_partitions', 200)
     builder = builder.config('spark.sql.shuffle.partitions', shuffle_partitions)
     
-    # Enable adaptive query execution
+    # Kryo for anything Spark serializes outside its columnar formats
+    # (same settings as the analytics job)
+    builder = builder.config('spark.serializer', 'org.apache.spark.serializer.KryoSerializer')
+    builder = builder.config('spark.kryo.registrationRequired', 'false')
+    
+    # Source-id mappings up to this size are broadcast when resolving
+    # citations, so the exploded edge list is not shuffled. With AQE the
+    # switch is also made at runtime from the measured mapping size.
+    broadcast_threshold = spark_config.get('broadcast_join_threshold')
+    if broadcast_threshold:
+        builder = builder.config('spark.sql.autoBroadcastJoinThreshold', broadcast_threshold)
+    
+    # Parquet codec for every table this job writes; zstd gives clearly
+    # smaller files than snappy for the text-heavy works table
+    builder = builder.config(
+        'spark.sql.parquet.compression.codec',
+        spark_config.get('parquet', {}).get('compression', 'zstd')
+    )
+    
+    # Enable adaptive query execution. The dedup aggregation and the
+    # citation join start over-partitioned and AQE merges the small
+    # post-shuffle partitions up to the advisory size; skewed join
+    # partitions (heavily cited works) are split.
     if spark_config.get('adaptive_query_execution', True):
         builder = builder.config('spark.sql.adaptive.enabled', 'true')
+        builder = builder.config('spark.sql.adaptive.coalescePartitions.enabled', 'true')
+        builder = builder.config(
+            'spark.sql.adaptive.coalescePartitions.initialPartitionNum', shuffle_partitions * 2
+        )
+        builder = builder.config(
+            'spark.sql.adaptive.advisoryPartitionSizeInBytes',
+            spark_config.get('advisory_partition_size', '128m')
+        )
+        builder = builder.config('spark.sql.adaptive.skewJoin.enabled', 'true')
+    
+    # Tables written in parallel share executors fairly instead of the
+    # first submitted write holding every core until it finishes
+    if spark_config.get('parallel_writes', 1) > 1:
+        builder = builder.config('spark.scheduler.mode', 'FAIR')
     
     return builder.getOrCreate()
 
 
+def hash_id(col: Column) -> Column:
+    """
+    Derive a stable 16-hex-character id from a string column.
+    
+    The ids only need 64 bits, so they come straight from xxhash64
+    (zero-padded hex of the signed hash) rather than a truncated SHA-256
+    digest, which costs far more CPU per row for the same id width.
+    
+    A NULL input gives a NULL id, as sha2 did; xxhash64 alone would
+    return its seed, merging e.g. every nameless author into one id.
+    """
+    return F.when(col.isNotNull(), F.lower(F.lpad(F.hex(F.xxhash64(col)), 16, "0")))
+
+
+def read_ndjson(spark: SparkSession, schema: StructType, path: str) -> DataFrame:
+    """
+    Read raw NDJSON batches with a fixed schema.
+    
+    Lines that fail to parse are dropped rather than kept as all-null
+    rows, which would otherwise surface as a bogus work. The encoding is
+    deliberately left unset: Spark then hands the raw UTF-8 bytes to
+    Jackson instead of decoding each line through a charset reader.
+    """
+    return spark.read.schema(schema) \
+        .option("mode", "DROPMALFORMED") \
+        .json(path)
+
+
 def read_raw_arxiv(spark: SparkSession, raw_path: str) -> DataFrame:
     """Read and parse raw arXiv data."""
     logger.info(f"Reading arXiv data from {raw_path}/arxiv")
@@ -79,7 +144,7 @@ def read_raw_arxiv(spark: SparkSession, raw_path: str) -> DataFrame:
         StructField("_batch_id", StringType())
     ])
     
-    df = spark.read.schema(schema).json(f"{raw_path}/arxiv/**/*.ndjson*")
+    df = read_ndjson(spark, schema, f"{raw_path}/arxiv/**/*.ndjson*")
     
     return df.select(
         F.concat(F.lit("arxiv:"), F.col("arxiv_id")).alias("source_id"),
@@ -125,13 +190,10 @@ def read_raw_pubmed(spark: SparkSession, raw_path: str) -> DataFrame:
         StructField("_batch_id", StringType())
     ])
     
-    df = spark.read.schema(schema).json(f"{raw_path}/pubmed/**/*.ndjson*")
+    df = read_ndjson(spark, schema, f"{raw_path}/pubmed/**/*.ndjson*")
     
     # Extract MeSH term names as fields using SQL expr for compatibility
-    df = df.withColumn(
-        "mesh_term_names",
-        F.expr("transform(mesh_terms, x -> x.term)")
-    )
+    mesh_term_names = F.expr("transform(mesh_terms, x -> x.term)")
     
     return df.select(
         F.concat(F.lit("pmid:"), F.col("pmid")).alias("source_id"),
@@ -139,8 +201,8 @@ def read_raw_pubmed(spark: SparkSession, raw_path: str) -> DataFrame:
         F.col("title"),
         F.col("abstract"),
         F.col("authors"),
-        F.col("mesh_term_names").alias("fields"),
-        F.element_at(F.col("mesh_term_names"), 1).alias("primary_field"),
+        mesh_term_names.alias("fields"),
+        F.element_at(mesh_term_names, 1).alias("primary_field"),
         F.to_date(F.col("pub_date")).alias("pub_date"),
         F.year(F.to_date(F.col("pub_date"))).alias("year"),
         F.col("doi"),
@@ -192,29 +254,26 @@ def read_raw_openalex(spark: SparkSession, raw_path: str) -> DataFrame:
         StructField("_batch_id", StringType())
     ])
     
-    df = spark.read.schema(schema).json(f"{raw_path}/openalex/**/*.ndjson*")
+    df = read_ndjson(spark, schema, f"{raw_path}/openalex/**/*.ndjson*")
     
     # Convert authors to common format - use expr for higher-order functions
     # First transform authors array to standard format
-    df = df.withColumn(
-        "authors_normalized",
-        F.expr("transform(authors, a -> struct(a.name as name, element_at(a.affiliations, 1) as affiliation))")
+    authors_normalized = F.expr(
+        "transform(authors, a -> struct(a.name as name, element_at(a.affiliations, 1) as affiliation))"
     )
     
     # Extract concept names as fields
-    df = df.withColumn(
-        "concept_names",
-        F.expr("transform(concepts, c -> c.name)")
-    )
+    concept_names = F.expr("transform(concepts, c -> c.name)")
     
+    # Derived columns are built inline in the one projection
     return df.select(
         F.concat(F.lit("openalex:"), F.col("openalex_id")).alias("source_id"),
         F.lit("openalex").alias("source"),
         F.col("title"),
         F.col("abstract"),
-        F.col("authors_normalized").alias("authors"),
-        F.col("concept_names").alias("fields"),
-        F.element_at(F.col("concept_names"), 1).alias("primary_field"),
+        authors_normalized.alias("authors"),
+        concept_names.alias("fields"),
+        F.element_at(concept_names, 1).alias("primary_field"),
         F.to_date(F.col("publication_date")).alias("pub_date"),
         F.col("publication_year").alias("year"),
         F.col("doi"),
@@ -238,7 +297,7 @@ def create_unified_works(
     # Generate stable work_id using hash of source_id
     unified = unified.withColumn(
         "work_id",
-        F.sha2(F.col("source_id"), 256).substr(1, 16)
+        hash_id(F.col("source_id"))
     )
     
     # Deduplicate by DOI if available
@@ -250,15 +309,21 @@ def create_unified_works(
         )
     )
     
-    # Keep first record per dedup_key, preferring OpenAlex (has citations)
-    window = Window.partitionBy("dedup_key").orderBy(
-        F.when(F.col("source") == "openalex", 0).otherwise(1),
-        F.col("_ingested_at").desc()
-    )
-    
-    unified = unified.withColumn("row_num", F.row_number().over(window)) \
-        .filter(F.col("row_num") == 1) \
-        .drop("row_num", "dedup_key")
+    # Keep one record per dedup_key, preferring OpenAlex (has citations),
+    # then the latest ingest. As an aggregate, duplicates are already
+    # collapsed map-side before the shuffle, unlike a row_number() window.
+    # _ingested_at only orders the candidates, so it is not carried into
+    # the (cached) works table.
+    columns = [c for c in unified.columns if c not in ("dedup_key", "_ingested_at")]
+    unified = unified.groupBy("dedup_key").agg(
+        F.max_by(
+            F.struct(*columns),
+            F.struct(
+                F.when(F.col("source") == "openalex", 1).otherwise(0),
+                F.col("_ingested_at")
+            )
+        ).alias("work")
+    ).select("work.*")
     
     return unified
 
@@ -281,13 +346,15 @@ def create_authors_table(works_df: DataFrame) -> DataFrame:
     # Create author_id from name hash
     authors = authors.withColumn(
         "author_id",
-        F.sha2(F.lower(F.trim(F.col("name"))), 256).substr(1, 16)
+        hash_id(F.lower(F.trim(F.col("name"))))
     )
     
-    # Deduplicate authors
-    unique_authors = authors.select(
-        "author_id", "name", "affiliation"
-    ).dropDuplicates(["author_id"])
+    # Deduplicate authors with a plain aggregation, taking an affiliation
+    # from any of the author's rows that has one
+    unique_authors = authors.groupBy("author_id").agg(
+        F.first("name", ignorenulls=True).alias("name"),
+        F.first("affiliation", ignorenulls=True).alias("affiliation")
+    )
     
     # Work-author relationships
     work_authors = authors.select(
@@ -310,12 +377,13 @@ def create_venues_table(works_df: DataFrame) -> DataFrame:
     # Create venue_id
     venues = venues.withColumn(
         "venue_id",
-        F.sha2(F.lower(F.trim(F.col("name"))), 256).substr(1, 16)
+        hash_id(F.lower(F.trim(F.col("name"))))
     )
     
-    # Add venue_id to works
+    # Add venue_id to works; there are far fewer venues than works, so
+    # broadcast them instead of shuffling works by venue name
     works_with_venue = works_df.join(
-        venues.select("name", "venue_id"),
+        F.broadcast(venues.select("name", "venue_id")),
         works_df.venue_name == venues.name,
         "left"
     ).drop("name")
@@ -327,31 +395,31 @@ def create_citations_table(works_df: DataFrame) -> DataFrame:
     """Create citation edges from referenced_works."""
     logger.info("Creating citations table")
     
-    # Explode referenced works
+    # Explode referenced works; only OpenAlex records carry references,
+    # so the other sources are dropped on the cheap source check first
     citations = works_df.filter(
-        F.size(F.col("referenced_works")) > 0
+        (F.col("source") == "openalex") &
+        (F.size(F.col("referenced_works")) > 0)
     ).select(
         F.col("work_id").alias("citing_work_id"),
         F.explode(F.col("referenced_works")).alias("cited_source_id")
     )
     
     # Join to get cited_work_id
-    # First, create a mapping of source_id -> work_id
-    source_mapping = works_df.select(
-        F.col("source_id"),
-        F.col("work_id")
-    )
-    
-    # Also create mapping for OpenAlex IDs
-    openalex_mapping = works_df.filter(
-        F.col("source") == "openalex"
-    ).select(
-        F.regexp_replace(F.col("source_id"), "^openalex:", "").alias("source_id"),
+    # Map source_id -> work_id, plus the bare OpenAlex ID that
+    # referenced_works uses, in one pass over works_df
+    all_mappings = works_df.select(
+        F.explode(F.array(
+            F.col("source_id"),
+            F.when(
+                F.col("source") == "openalex",
+                F.regexp_replace(F.col("source_id"), "^openalex:", "")
+            )
+        )).alias("source_id"),
         F.col("work_id")
-    )
-    
-    # Union mappings
-    all_mappings = source_mapping.union(openalex_mapping).dropDuplicates(["source_id"])
+    ).filter(
+        F.col("source_id").isNotNull()
+    ).dropDuplicates(["source_id"])
     
     # Join citations with mapping
     citations = citations.join(
@@ -369,15 +437,55 @@ def create_citations_table(works_df: DataFrame) -> DataFrame:
     return citations
 
 
-def write_parquet(df: DataFrame, path: str, partition_cols: Optional[List[str]] = None):
-    """Write DataFrame to Parquet with partitioning."""
-    writer = df.write.mode("overwrite").option("compression", "snappy")
+def write_parquet(
+    df: DataFrame,
+    path: str,
+    partition_cols: Optional[List[str]] = None,
+    sort_cols: Optional[List[str]] = None
+):
+    """
+    Write DataFrame to Parquet with partitioning.
+    
+    With sort_cols, each file holds a contiguous, sorted range of those
+    columns, so readers filtering or joining on the first one can skip
+    files and row groups on their min/max statistics.
+    """
+    if partition_cols:
+        # Shuffle each partition value into one task so every directory
+        # gets one file, instead of one file per task per value
+        df = df.repartition(*partition_cols).sortWithinPartitions(*partition_cols)
+    elif sort_cols:
+        df = df.repartitionByRange(sort_cols[0]).sortWithinPartitions(*sort_cols)
+    
+    writer = df.write.mode("overwrite")
     
     if partition_cols:
         writer = writer.partitionBy(*partition_cols)
     
     writer.parquet(path)
-    logger.info(f"Wrote {df.count()} records to {path}")
+    logger.info(f"Wrote {path}")
+
+
+def write_tables(
+    spark: SparkSession,
+    tables: List[Tuple[str, DataFrame, str, Dict[str, Any]]],
+    max_parallel: int = 1
+):
+    """
+    Write several tables, up to max_parallel at a time.
+    
+    Each table is a (name, df, path, write_parquet kwargs) tuple. Writes
+    are submitted from worker threads, each in its own scheduler pool, so
+    Spark can run their stages side by side over the shared cached input.
+    """
+    def write(name: str, df: DataFrame, path: str, options: Dict[str, Any]):
+        spark.sparkContext.setLocalProperty("spark.scheduler.pool", name)
+        write_parquet(df, path, **options)
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        futures = [executor.submit(write, *table) for table in tables]
+        for future in futures:
+            future.result()
 
 
 def main():
@@ -407,27 +515,34 @@ def main():
         pubmed_df = read_raw_pubmed(spark, raw_path)
         openalex_df = read_raw_openalex(spark, raw_path)
         
-        # Log source counts
-        logger.info(f"arXiv records: {arxiv_df.count()}")
-        logger.info(f"PubMed records: {pubmed_df.count()}")
-        logger.info(f"OpenAlex records: {openalex_df.count()}")
+        # Source counts re-parse the NDJSON; each is a full job, so they
+        # are only logged at DEBUG
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"arXiv records: {arxiv_df.count()}")
+            logger.debug(f"PubMed records: {pubmed_df.count()}")
+            logger.debug(f"OpenAlex records: {openalex_df.count()}")
         
-        # Create unified works
+        # Create unified works; every table below derives from it, so the
+        # union and dedup run once and the count fills the cache
         works_df = create_unified_works(arxiv_df, pubmed_df, openalex_df)
-        works_df.cache()
+        works_df = works_df.persist(StorageLevel.MEMORY_AND_DISK)
         logger.info(f"Unified works (deduplicated): {works_df.count()}")
         
         # Create authors
         authors_df, work_authors_df = create_authors_table(works_df)
-        logger.info(f"Unique authors: {authors_df.count()}")
+        if debug:
+            logger.debug(f"Unique authors: {authors_df.count()}")
         
         # Create venues
         venues_df, works_with_venue = create_venues_table(works_df)
-        logger.info(f"Unique venues: {venues_df.count()}")
+        if debug:
+            logger.debug(f"Unique venues: {venues_df.count()}")
         
         # Create citations
         citations_df = create_citations_table(works_df)
-        logger.info(f"Citation edges: {citations_df.count()}")
+        if debug:
+            logger.debug(f"Citation edges: {citations_df.count()}")
         
         # Write all tables
         logger.info("Writing Parquet tables...")
@@ -438,19 +553,18 @@ def main():
             "fields", "primary_field", "pub_date", "year",
             "doi", "venue_id", "venue_name"
         )
-        write_parquet(final_works, f"{processed_path}/works", ["year"])
-        
-        # Authors
-        write_parquet(authors_df, f"{processed_path}/authors")
-        
-        # Work-Authors
-        write_parquet(work_authors_df, f"{processed_path}/work_authors")
-        
-        # Venues
-        write_parquet(venues_df, f"{processed_path}/venues")
         
-        # Citations
-        write_parquet(citations_df, f"{processed_path}/citations")
+        tables = [
+            ("works", final_works, f"{processed_path}/works", {"partition_cols": ["year"]}),
+            ("authors", authors_df, f"{processed_path}/authors", {}),
+            ("work_authors", work_authors_df, f"{processed_path}/work_authors",
+             {"sort_cols": ["work_id", "position"]}),
+            ("venues", venues_df, f"{processed_path}/venues", {}),
+            ("citations", citations_df, f"{processed_path}/citations",
+             {"sort_cols": ["citing_work_id", "cited_work_id"]}),
+        ]
+        write_tables(spark, tables, config.get('spark', {}).get('parallel_writes', 1))
+        works_df.unpersist()
         
         logger.info("=" * 60)
         logger.info("ETL Pipeline Complete!")